@@ -28,16 +28,32 @@ SOURCE_DATASET_ID = os.environ.get('SOURCE_DATASET_ID', 'billing_data')
 SOURCE_TABLE_ID = os.environ.get('SOURCE_TABLE_ID', 'daily_costs')
 OUTPUT_DATASET_ID = os.environ.get('OUTPUT_DATASET_ID', 'billing_reports')
 BQ_LOCATION = os.environ.get('BQ_LOCATION', 'US')
+BQ_PAGE_SIZE = int(os.environ.get('BQ_PAGE_SIZE', '10000'))
+BQ_HTTP_POOL_SIZE = int(os.environ.get('BQ_HTTP_POOL_SIZE', '32'))
 
 # Firestore Configuration
 FIRESTORE_PROJECT_ID = os.environ.get('FIRESTORE_PROJECT_ID', GCP_PROJECT_ID)
 FIRESTORE_DATABASE = os.environ.get('FIRESTORE_DATABASE', '(default)')
 FIRESTORE_COLLECTION_PREFIX = os.environ.get('FIRESTORE_COLLECTION_PREFIX', 'cost_reports')
+FIRESTORE_WRITE_CONCURRENCY = int(os.environ.get('FIRESTORE_WRITE_CONCURRENCY', '10'))
+FIRESTORE_BATCH_MAX_OPS = int(os.environ.get('FIRESTORE_BATCH_MAX_OPS', '500'))
+FIRESTORE_BATCH_MAX_BYTES = int(os.environ.get('FIRESTORE_BATCH_MAX_BYTES', str(9_961_472)))  # 9.5 MiB, under the 10 MiB request limit
+FIRESTORE_MAX_REPORT_ROWS = int(os.environ.get('FIRESTORE_MAX_REPORT_ROWS', '0'))  # 0 = no limit
+
+if FIRESTORE_WRITE_CONCURRENCY < 1:
+    raise ValueError(f"FIRESTORE_WRITE_CONCURRENCY must be at least 1, got {FIRESTORE_WRITE_CONCURRENCY}")
+# A Firestore commit accepts at most 500 writes
+if not 1 <= FIRESTORE_BATCH_MAX_OPS <= 500:
+    raise ValueError(f"FIRESTORE_BATCH_MAX_OPS must be between 1 and 500, got {FIRESTORE_BATCH_MAX_OPS}")
+
+# Reports over FIRESTORE_MAX_REPORT_ROWS are extracted here instead (unset = always use Firestore)
+REPORT_EXPORT_BUCKET = os.environ.get('REPORT_EXPORT_BUCKET', '')
 
 # Processing Configuration
 DAYS_BACK = int(os.environ.get('DAYS_BACK', '30'))
 TOP_COST_DRIVERS_COUNT = int(os.environ.get('TOP_COST_DRIVERS_COUNT', '20'))
 TOP_COST_DRIVERS_DAYS = int(os.environ.get('TOP_COST_DRIVERS_DAYS', '7'))
+PROJECT_TOP_SERVICES_COUNT = int(os.environ.get('PROJECT_TOP_SERVICES_COUNT', '20'))
 
 # Logging Configuration
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
@@ -50,11 +66,19 @@ CONFIG = {
     'source_table_id': SOURCE_TABLE_ID,
     'output_dataset_id': OUTPUT_DATASET_ID,
     'bq_location': BQ_LOCATION,
+    'bq_page_size': BQ_PAGE_SIZE,
+    'bq_http_pool_size': BQ_HTTP_POOL_SIZE,
     'firestore_project_id': FIRESTORE_PROJECT_ID,
     'firestore_database': FIRESTORE_DATABASE,
     'firestore_collection_prefix': FIRESTORE_COLLECTION_PREFIX,
+    'firestore_write_concurrency': FIRESTORE_WRITE_CONCURRENCY,
+    'firestore_batch_max_ops': FIRESTORE_BATCH_MAX_OPS,
+    'firestore_batch_max_bytes': FIRESTORE_BATCH_MAX_BYTES,
+    'firestore_max_report_rows': FIRESTORE_MAX_REPORT_ROWS,
+    'report_export_bucket': REPORT_EXPORT_BUCKET,
     'days_back': DAYS_BACK,
     'top_cost_drivers_count': TOP_COST_DRIVERS_COUNT,
     'top_cost_drivers_days': TOP_COST_DRIVERS_DAYS,
+    'project_top_services_count': PROJECT_TOP_SERVICES_COUNT,
     'log_level': LOG_LEVEL,
 }
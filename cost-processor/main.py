@@ -5,13 +5,24 @@ by project ID and services. Creates aggregated views and summary tables.
 """
 
 import os
+import asyncio
 import logging
+import logging.handlers
+import queue
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Set
 
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import bigquery
+from google.cloud import bigquery_storage
 from google.cloud import firestore
 from google.api_core import exceptions
+from google.api_core import retry_async
+import pyarrow as pa
+import pyarrow.compute as pc
+from requests.adapters import HTTPAdapter
 
 # Import configuration
 import config
@@ -23,21 +34,220 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# BigQuery column types that are converted to ISO strings before writing to Firestore
+TIME_FIELD_TYPES = ('DATE', 'DATETIME', 'TIMESTAMP', 'TIME')
+
+# Errors from Firestore and BigQuery calls that are worth retrying
+is_transient_error = retry_async.if_exception_type(
+    exceptions.Aborted,
+    exceptions.DeadlineExceeded,
+    exceptions.InternalServerError,
+    exceptions.ResourceExhausted,
+    exceptions.ServiceUnavailable,
+)
+
+# Backoff for Firestore batch commits that fail with transient errors
+FIRESTORE_WRITE_RETRY = retry_async.AsyncRetry(
+    predicate=is_transient_error,
+    initial=1.0,
+    maximum=60.0,
+    multiplier=2.0,
+    deadline=300.0,
+)
+
+
+def is_transient_report_error(exc: Exception) -> bool:
+    """
+    Check whether a failed report save is worth re-running.
+    
+    A batch commit that runs out of FIRESTORE_WRITE_RETRY's deadline raises
+    RetryError, wrapping the last transient error, so the wrapped error is checked.
+    """
+    if isinstance(exc, exceptions.RetryError) and exc.cause is not None:
+        exc = exc.cause
+    return is_transient_error(exc)
+
+
+# Backoff for re-running a whole report save (e.g. when a batch runs out of retries
+# or the BigQuery read fails); documents are overwritten, so a rerun is safe
+FIRESTORE_REPORT_RETRY = retry_async.AsyncRetry(
+    predicate=is_transient_report_error,
+    initial=1.0,
+    maximum=30.0,
+    multiplier=2.0,
+    deadline=300.0,
+    on_error=lambda e: logger.warning(f"Transient error saving report to Firestore, retrying: {e}"),
+)
+
+# BigQuery table exported to Firestore for each report. daily_cost_trends is a
+# view, which cannot be listed, so its base table is exported instead.
+FIRESTORE_REPORT_TABLES = {
+    'project_cost_summary': 'project_cost_summary',
+    'service_cost_summary': 'service_cost_summary',
+    'project_service_cost_summary': 'project_service_cost_summary',
+    'daily_cost_trends': 'daily_cost_trends_base',
+    'top_cost_drivers': 'top_cost_drivers',
+    'location_cost_summary': 'location_cost_summary',
+}
+
+# Fields (with fallback values) that make up the Firestore document ID of each report.
+# They cover every column the report table groups by, so each row gets its own document.
+# Changing them changes existing document IDs; documents under the old IDs are
+# removed by _delete_stale_documents on the next run.
+DOCUMENT_ID_FIELDS = {
+    'project_cost_summary': (
+        ('project_id', 'unknown'), ('project_name', 'none'),
+        ('billing_account_id', 'none'), ('billing_account_name', 'none'), ('currency', 'none'),
+    ),
+    'service_cost_summary': (
+        ('service_description', 'unknown'), ('usage_unit', 'none'), ('currency', 'none'),
+    ),
+    'project_service_cost_summary': (
+        ('project_id', 'unknown'), ('project_name', 'none'),
+        ('billing_account_id', 'none'), ('billing_account_name', 'none'),
+        ('service_description', 'unknown'), ('usage_unit', 'none'), ('currency', 'none'),
+    ),
+    'daily_cost_trends': (('date', 'unknown'), ('currency', 'none')),
+    'top_cost_drivers': (
+        ('service_description', 'unknown'), ('sku_description', 'unknown'),
+        ('usage_unit', 'none'), ('currency', 'none'),
+    ),
+    'location_cost_summary': (('region', 'unknown'), ('location_zone', 'none'), ('currency', 'none')),
+}
+
+# Firestore document IDs cannot contain '/'
+DOCUMENT_ID_TRANSLATION = str.maketrans('/', '_')
+
+# Bytes added to the estimated size of each field value, and of each write
+# (database name prefix of the document path, write envelope), see _estimate_write_bytes
+FIELD_ENCODING_OVERHEAD = 8
+WRITE_ENCODING_OVERHEAD = 256
+
 # Log configuration on startup
 logger.info(f"Starting with environment: {config.ENVIRONMENT}")
 logger.debug(f"Configuration: {config.CONFIG}")
 
 
+@lru_cache(maxsize=None)
+def get_credentials():
+    """
+    Return the process-wide application default credentials and project.
+    
+    Loaded once and shared by every client, so credential discovery and the
+    initial token refresh are not repeated per client.
+    """
+    return google.auth.default(scopes=["https://www.googleapis.com/auth/cloud-platform"])
+
+
+@lru_cache(maxsize=None)
+def get_bigquery_client() -> bigquery.Client:
+    """
+    Return the process-wide BigQuery client.
+    
+    The client uses one authorized HTTP session whose connection pool is sized
+    for the concurrent report jobs, so TLS connections are reused across calls.
+    """
+    credentials, project = get_credentials()
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=config.BQ_HTTP_POOL_SIZE, pool_maxsize=config.BQ_HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    return bigquery.Client(project=project, credentials=credentials, _http=session)
+
+
+@lru_cache(maxsize=None)
+def get_firestore_client() -> firestore.AsyncClient:
+    """Return the process-wide Firestore client."""
+    credentials, _ = get_credentials()
+    return firestore.AsyncClient(
+        project=config.FIRESTORE_PROJECT_ID,
+        database=config.FIRESTORE_DATABASE,
+        credentials=credentials
+    )
+
+
+@lru_cache(maxsize=None)
+def get_bigquery_storage_client() -> bigquery_storage.BigQueryReadClient:
+    """Return the process-wide BigQuery Storage Read API client."""
+    credentials, _ = get_credentials()
+    return bigquery_storage.BigQueryReadClient(credentials=credentials)
+
+
+def _estimate_value_bytes(value: Any) -> int:
+    """
+    Return an upper estimate of the encoded size of a Firestore field value.
+    
+    Follows Firestore's storage size rules (strings are their UTF-8 length
+    plus one, numbers eight bytes, maps and arrays the sum of their entries),
+    plus FIELD_ENCODING_OVERHEAD bytes per value for the protobuf tags and
+    lengths around it.
+    """
+    if value is None or isinstance(value, bool):
+        size = 1
+    elif isinstance(value, (int, float)):
+        size = 8
+    elif isinstance(value, str):
+        size = len(value.encode('utf-8')) + 1
+    elif isinstance(value, bytes):
+        size = len(value) + 1
+    elif isinstance(value, dict):
+        size = sum(len(key.encode('utf-8')) + 1 + _estimate_value_bytes(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size = sum(_estimate_value_bytes(item) for item in value)
+    else:
+        # Decimal and other scalars
+        size = len(str(value).encode('utf-8')) + 1
+    return size + FIELD_ENCODING_OVERHEAD
+
+
+def _estimate_write_bytes(document_path: str, doc_data: Dict[str, Any]) -> int:
+    """Return an upper estimate of the encoded size of a write setting doc_data at document_path."""
+    return len(document_path.encode('utf-8')) + WRITE_ENCODING_OVERHEAD + _estimate_value_bytes(doc_data)
+
+
+async def _cancel_tasks(tasks) -> None:
+    """Cancel tasks that are still running and wait for them, retrieving their exceptions."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _fetch_next_batch(batches, time_columns: List[str]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Return the rows of the next Arrow record batch as dictionaries, or None when exhausted.
+    
+    Date/time columns are converted to ISO strings column by column before the
+    rows are built: DATE columns are cast in Arrow, the others are formatted
+    with isoformat() so their text matches what Firestore documents already hold.
+    """
+    batch = next(batches, None)
+    if batch is None:
+        return None
+    
+    if time_columns:
+        columns = []
+        for name, column in zip(batch.schema.names, batch.columns):
+            if name in time_columns:
+                if pa.types.is_date(column.type):
+                    column = pc.cast(column, pa.string())
+                else:
+                    column = pa.array(
+                        [value.isoformat() if value is not None else None for value in column.to_pylist()],
+                        type=pa.string()
+                    )
+            columns.append(column)
+        batch = pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+    
+    return batch.to_pylist()
+
+
 class CostProcessor:
     """Processes billing data and generates cost reports by project and service."""
     
     def __init__(self):
         """Initialize the BigQuery and Firestore clients and configuration."""
-        self.bq_client = bigquery.Client()
-        self.firestore_client = firestore.Client(
-            project=config.FIRESTORE_PROJECT_ID,
-            database=config.FIRESTORE_DATABASE
-        )
+        self.bq_client = get_bigquery_client()
+        self.bqstorage_client = get_bigquery_storage_client()
+        self.firestore_client = get_firestore_client()
         
         # Get configuration from config module
         self.project_id = config.GCP_PROJECT_ID
@@ -48,6 +258,7 @@ class CostProcessor:
         self.firestore_collection_prefix = config.FIRESTORE_COLLECTION_PREFIX
         
         self.source_table_ref = f"{self.project_id}.{self.source_dataset_id}.{self.source_table_id}"
+        self.report_script = self._build_report_script()
         logger.info(f"Initialized CostProcessor for project: {self.project_id}")
         logger.info(f"Source table: {self.source_table_ref}")
         logger.info(f"Output dataset: {self.project_id}.{self.output_dataset_id}")
@@ -67,18 +278,19 @@ class CostProcessor:
             self.bq_client.create_dataset(dataset, timeout=30)
             logger.info(f"Output dataset {dataset_ref} created successfully")
     
-    def create_project_service_daily_report(self, days_back: int = 30):
+    def _project_service_daily_sql(self) -> str:
         """
-        Create a report of daily costs by project and service.
+        Build the statement for the daily costs by project and service report.
         
-        Args:
-            days_back: Number of days to include in the report
+        Returns:
+            SQL statement for the report script
         """
         table_ref = f"{self.project_id}.{self.output_dataset_id}.project_service_daily_costs"
-        logger.info(f"Creating project-service daily cost report: {table_ref}")
         
-        query = f"""
-        CREATE OR REPLACE TABLE `{table_ref}` AS
+        return f"""
+        CREATE OR REPLACE TABLE `{table_ref}`
+        OPTIONS (description = FORMAT("Daily costs aggregated by project and service (last %d days)", @days_back))
+        AS
         SELECT
             date,
             billing_account_id,
@@ -95,10 +307,9 @@ class CostProcessor:
             COUNT(*) as line_item_count,
             MAX(collected_at) as last_updated
         FROM
-            `{self.source_table_ref}`
+            billing_window
         WHERE
-            date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days_back} DAY)
-            AND cost IS NOT NULL
+            date >= window_start
         GROUP BY
             date,
             billing_account_id,
@@ -110,40 +321,38 @@ class CostProcessor:
             usage_unit
         ORDER BY
             date DESC,
-            total_cost DESC
+            total_cost DESC;
         """
-        
-        try:
-            query_job = self.bq_client.query(query)
-            query_job.result()
-            logger.info(f"Successfully created project-service daily cost report")
-            
-            # Add table description
-            table = self.bq_client.get_table(table_ref)
-            table.description = f"Daily costs aggregated by project and service (last {days_back} days)"
-            self.bq_client.update_table(table, ["description"])
-            
-        except exceptions.GoogleAPIError as e:
-            logger.error(f"Error creating project-service daily report: {e}")
-            raise
     
-    def create_project_summary_report(self, days_back: int = 30):
+    def _summary_reports_sql(self) -> str:
         """
-        Create a summary report of total costs by project.
+        Build the statements for the project, service and project-service cost summary reports.
         
-        Args:
-            days_back: Number of days to include in the report
+        All three summaries aggregate the same filtered source rows with
+        different keys, so they are computed in a single scan using
+        GROUPING SETS into a temporary table, which is then split into the
+        three report tables.
+        
+        Returns:
+            SQL statements for the report script
         """
-        table_ref = f"{self.project_id}.{self.output_dataset_id}.project_cost_summary"
-        logger.info(f"Creating project cost summary report: {table_ref}")
+        dataset_ref = f"{self.project_id}.{self.output_dataset_id}"
         
-        query = f"""
-        CREATE OR REPLACE TABLE `{table_ref}` AS
+        return f"""
+        CREATE TEMP TABLE cost_summary_agg AS
         SELECT
+            CASE
+                WHEN GROUPING(project_id) = 0 AND GROUPING(service_description) = 0 THEN 'project_service'
+                WHEN GROUPING(project_id) = 0 THEN 'project'
+                ELSE 'service'
+            END as grouping_set,
             project_id,
             project_name,
             billing_account_id,
             billing_account_name,
+            service_description,
+            currency,
+            usage_unit,
             MIN(date) as first_cost_date,
             MAX(date) as last_cost_date,
             COUNT(DISTINCT date) as days_with_costs,
@@ -151,234 +360,299 @@ class CostProcessor:
             SUM(credits) as total_credits,
             SUM(cost) + SUM(credits) as net_cost,
             AVG(cost) as avg_daily_cost,
-            currency,
+            SUM(usage_amount) as total_usage_amount,
+            COUNT(DISTINCT project_id) as project_count,
+            COUNT(DISTINCT billing_account_id) as billing_account_count,
             COUNT(DISTINCT service_description) as service_count,
-            ARRAY_AGG(DISTINCT service_description IGNORE NULLS ORDER BY service_description) as services_used,
+            COUNT(DISTINCT sku_description) as sku_count,
+            -- Most frequent services only; avoids a per-project sorted distinct set
+            ARRAY(
+                SELECT top.value
+                FROM UNNEST(APPROX_TOP_COUNT(service_description, {config.PROJECT_TOP_SERVICES_COUNT})) AS top
+                WHERE top.value IS NOT NULL
+                ORDER BY top.value
+            ) as services_used,
             MAX(collected_at) as last_updated
         FROM
-            `{self.source_table_ref}`
+            billing_window
         WHERE
-            date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days_back} DAY)
-            AND cost IS NOT NULL
-            AND project_id IS NOT NULL
-        GROUP BY
+            date >= window_start
+        GROUP BY GROUPING SETS (
+            (project_id, project_name, billing_account_id, billing_account_name, currency),
+            (service_description, currency, usage_unit),
+            (project_id, project_name, service_description, billing_account_id, billing_account_name, currency, usage_unit)
+        );
+        
+        CREATE OR REPLACE TABLE `{dataset_ref}.project_cost_summary`
+        OPTIONS (description = FORMAT("Total costs by project (last %d days)", @days_back))
+        AS
+        SELECT
             project_id,
             project_name,
             billing_account_id,
             billing_account_name,
-            currency
+            first_cost_date,
+            last_cost_date,
+            days_with_costs,
+            total_cost,
+            total_credits,
+            net_cost,
+            avg_daily_cost,
+            currency,
+            service_count,
+            services_used,
+            last_updated
+        FROM
+            cost_summary_agg
+        WHERE
+            grouping_set = 'project'
+            AND project_id IS NOT NULL
         ORDER BY
-            total_cost DESC
-        """
-        
-        try:
-            query_job = self.bq_client.query(query)
-            query_job.result()
-            logger.info(f"Successfully created project cost summary report")
-            
-            # Add table description
-            table = self.bq_client.get_table(table_ref)
-            table.description = f"Total costs by project (last {days_back} days)"
-            self.bq_client.update_table(table, ["description"])
-            
-        except exceptions.GoogleAPIError as e:
-            logger.error(f"Error creating project summary report: {e}")
-            raise
-    
-    def create_service_summary_report(self, days_back: int = 30):
-        """
-        Create a summary report of costs by service across all projects.
+            total_cost DESC;
         
-        Args:
-            days_back: Number of days to include in the report
-        """
-        table_ref = f"{self.project_id}.{self.output_dataset_id}.service_cost_summary"
-        logger.info(f"Creating service cost summary report: {table_ref}")
-        
-        query = f"""
-        CREATE OR REPLACE TABLE `{table_ref}` AS
+        CREATE OR REPLACE TABLE `{dataset_ref}.service_cost_summary`
+        OPTIONS (description = FORMAT("Total costs by service across all projects (last %d days)", @days_back))
+        AS
         SELECT
             service_description,
-            COUNT(DISTINCT project_id) as project_count,
-            COUNT(DISTINCT billing_account_id) as billing_account_count,
-            MIN(date) as first_cost_date,
-            MAX(date) as last_cost_date,
-            SUM(cost) as total_cost,
-            SUM(credits) as total_credits,
-            SUM(cost) + SUM(credits) as net_cost,
-            AVG(cost) as avg_daily_cost,
+            project_count,
+            billing_account_count,
+            first_cost_date,
+            last_cost_date,
+            total_cost,
+            total_credits,
+            net_cost,
+            avg_daily_cost,
             currency,
-            SUM(usage_amount) as total_usage_amount,
+            total_usage_amount,
             usage_unit,
-            MAX(collected_at) as last_updated
+            last_updated
         FROM
-            `{self.source_table_ref}`
+            cost_summary_agg
         WHERE
-            date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days_back} DAY)
-            AND cost IS NOT NULL
+            grouping_set = 'service'
             AND service_description IS NOT NULL
-        GROUP BY
-            service_description,
-            currency,
-            usage_unit
         ORDER BY
-            total_cost DESC
-        """
-        
-        try:
-            query_job = self.bq_client.query(query)
-            query_job.result()
-            logger.info(f"Successfully created service cost summary report")
-            
-            # Add table description
-            table = self.bq_client.get_table(table_ref)
-            table.description = f"Total costs by service across all projects (last {days_back} days)"
-            self.bq_client.update_table(table, ["description"])
-            
-        except exceptions.GoogleAPIError as e:
-            logger.error(f"Error creating service summary report: {e}")
-            raise
-    
-    def create_project_service_summary_report(self, days_back: int = 30):
-        """
-        Create a detailed summary of costs by project and service.
+            total_cost DESC;
         
-        Args:
-            days_back: Number of days to include in the report
-        """
-        table_ref = f"{self.project_id}.{self.output_dataset_id}.project_service_cost_summary"
-        logger.info(f"Creating project-service cost summary report: {table_ref}")
-        
-        query = f"""
-        CREATE OR REPLACE TABLE `{table_ref}` AS
+        CREATE OR REPLACE TABLE `{dataset_ref}.project_service_cost_summary`
+        OPTIONS (description = FORMAT("Costs by project and service with percentage breakdown (last %d days)", @days_back))
+        AS
         SELECT
             project_id,
             project_name,
             service_description,
             billing_account_id,
             billing_account_name,
-            MIN(date) as first_cost_date,
-            MAX(date) as last_cost_date,
-            COUNT(DISTINCT date) as days_with_costs,
-            SUM(cost) as total_cost,
-            SUM(credits) as total_credits,
-            SUM(cost) + SUM(credits) as net_cost,
-            AVG(cost) as avg_daily_cost,
+            first_cost_date,
+            last_cost_date,
+            days_with_costs,
+            total_cost,
+            total_credits,
+            net_cost,
+            avg_daily_cost,
             currency,
-            SUM(usage_amount) as total_usage_amount,
+            total_usage_amount,
             usage_unit,
-            COUNT(DISTINCT sku_description) as sku_count,
-            MAX(collected_at) as last_updated,
+            sku_count,
+            last_updated,
             -- Calculate percentage of project's total cost
-            SUM(cost) / SUM(SUM(cost)) OVER (PARTITION BY project_id) * 100 as pct_of_project_cost
+            total_cost / SUM(total_cost) OVER (PARTITION BY project_id) * 100 as pct_of_project_cost
         FROM
-            `{self.source_table_ref}`
+            cost_summary_agg
         WHERE
-            date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days_back} DAY)
-            AND cost IS NOT NULL
+            grouping_set = 'project_service'
             AND project_id IS NOT NULL
             AND service_description IS NOT NULL
-        GROUP BY
-            project_id,
-            project_name,
-            service_description,
-            billing_account_id,
-            billing_account_name,
-            currency,
-            usage_unit
         ORDER BY
             project_id,
-            total_cost DESC
+            total_cost DESC;
         """
-        
-        try:
-            query_job = self.bq_client.query(query)
-            query_job.result()
-            logger.info(f"Successfully created project-service cost summary report")
-            
-            # Add table description
-            table = self.bq_client.get_table(table_ref)
-            table.description = f"Costs by project and service with percentage breakdown (last {days_back} days)"
-            self.bq_client.update_table(table, ["description"])
-            
-        except exceptions.GoogleAPIError as e:
-            logger.error(f"Error creating project-service summary report: {e}")
-            raise
     
-    def create_daily_trend_report(self, days_back: int = 30):
+    def _daily_trend_sql(self) -> str:
         """
-        Create a daily cost trend report for monitoring.
+        Build the statements for the daily cost trend report.
         
-        Args:
-            days_back: Number of days to include in the report
+        Daily totals are kept in a base table that is maintained incrementally
+        with MERGE: each run re-aggregates from the earliest of the two most
+        recent stored days, the first day in the window with no stored row (e.g.
+        after DAYS_BACK is raised), and the first day whose source rows were
+        collected after its stored row (e.g. a cost-cron backfill). Everything
+        from that day onwards is rebuilt. Older days whose source rows are
+        deleted without being re-collected are not noticed. The moving average
+        and day-over-day columns are computed by the daily_cost_trends view on
+        top of the base table.
+        
+        The statements use the window_start and refresh_from variables, which
+        create_all_reports declares at the top of the script.
+        
+        Returns:
+            SQL statements for the report script
         """
         table_ref = f"{self.project_id}.{self.output_dataset_id}.daily_cost_trends"
-        logger.info(f"Creating daily cost trend report: {table_ref}")
+        base_table_ref = f"{self.project_id}.{self.output_dataset_id}.daily_cost_trends_base"
         
-        query = f"""
-        CREATE OR REPLACE TABLE `{table_ref}` AS
+        return f"""
+        CREATE TABLE IF NOT EXISTS `{base_table_ref}` (
+            date DATE,
+            currency STRING,
+            active_projects INT64,
+            services_used INT64,
+            billing_accounts INT64,
+            total_cost FLOAT64,
+            total_credits FLOAT64,
+            net_cost FLOAT64,
+            line_items INT64,
+            last_updated TIMESTAMP
+        )
+        PARTITION BY date
+        OPTIONS (description = "Daily cost totals backing the daily_cost_trends view");
+        
+        -- Re-aggregate from the last two stored days onwards (full window on first run),
+        -- or from an earlier day that is missing from the base table or was collected
+        -- again after it was stored (a wider window or a cost-cron backfill)
+        SET refresh_from = (
+            SELECT GREATEST(window_start, LEAST(
+                IFNULL(DATE_SUB(MAX(date), INTERVAL 1 DAY), window_start),
+                IFNULL((
+                    SELECT MIN(source.date)
+                    FROM (
+                        SELECT date, IFNULL(currency, '') as currency_key, MAX(collected_at) as last_collected
+                        FROM billing_window
+                        WHERE date >= window_start
+                        GROUP BY date, currency_key
+                    ) AS source
+                    LEFT JOIN (
+                        SELECT date, IFNULL(currency, '') as currency_key, last_updated
+                        FROM `{base_table_ref}`
+                    ) AS stored
+                        ON stored.date = source.date AND stored.currency_key = source.currency_key
+                    WHERE stored.date IS NULL OR source.last_collected > stored.last_updated
+                ), CURRENT_DATE())
+            ))
+            FROM `{base_table_ref}`
+        );
+        
+        MERGE `{base_table_ref}` AS target
+        USING (
+            SELECT
+                date,
+                currency,
+                COUNT(DISTINCT project_id) as active_projects,
+                COUNT(DISTINCT service_description) as services_used,
+                COUNT(DISTINCT billing_account_id) as billing_accounts,
+                SUM(cost) as total_cost,
+                SUM(credits) as total_credits,
+                SUM(cost) + SUM(credits) as net_cost,
+                COUNT(*) as line_items,
+                MAX(collected_at) as last_updated
+            FROM
+                billing_window
+            WHERE
+                date >= refresh_from
+            GROUP BY
+                date,
+                currency
+        ) AS source
+        ON target.date = source.date
+            AND target.currency IS NOT DISTINCT FROM source.currency
+        WHEN MATCHED THEN UPDATE SET
+            active_projects = source.active_projects,
+            services_used = source.services_used,
+            billing_accounts = source.billing_accounts,
+            total_cost = source.total_cost,
+            total_credits = source.total_credits,
+            net_cost = source.net_cost,
+            line_items = source.line_items,
+            last_updated = source.last_updated
+        WHEN NOT MATCHED BY TARGET THEN INSERT (
+            date, currency, active_projects, services_used, billing_accounts,
+            total_cost, total_credits, net_cost, line_items, last_updated
+        ) VALUES (
+            source.date, source.currency, source.active_projects, source.services_used, source.billing_accounts,
+            source.total_cost, source.total_credits, source.net_cost, source.line_items, source.last_updated
+        )
+        -- Drop refreshed days that no longer have data and days that left the window
+        WHEN NOT MATCHED BY SOURCE AND (target.date >= refresh_from OR target.date < window_start) THEN DELETE;
+        
+        CREATE OR REPLACE VIEW `{table_ref}`
+        OPTIONS (description = "Daily cost trends with moving averages and day-over-day changes")
+        AS
         SELECT
             date,
-            COUNT(DISTINCT project_id) as active_projects,
-            COUNT(DISTINCT service_description) as services_used,
-            COUNT(DISTINCT billing_account_id) as billing_accounts,
-            SUM(cost) as total_cost,
-            SUM(credits) as total_credits,
-            SUM(cost) + SUM(credits) as net_cost,
+            active_projects,
+            services_used,
+            billing_accounts,
+            total_cost,
+            total_credits,
+            net_cost,
             currency,
-            COUNT(*) as line_items,
-            MAX(collected_at) as last_updated,
+            line_items,
+            last_updated,
             -- 7-day moving average
-            AVG(SUM(cost)) OVER (
+            AVG(total_cost) OVER (
+                PARTITION BY currency
                 ORDER BY date
                 ROWS BETWEEN 6 PRECEDING AND CURRENT ROW
             ) as cost_7day_avg,
             -- Day-over-day change
-            SUM(cost) - LAG(SUM(cost)) OVER (ORDER BY date) as cost_change_from_prev_day,
+            total_cost - LAG(total_cost) OVER (PARTITION BY currency ORDER BY date) as cost_change_from_prev_day,
             -- Percentage change
             SAFE_DIVIDE(
-                SUM(cost) - LAG(SUM(cost)) OVER (ORDER BY date),
-                LAG(SUM(cost)) OVER (ORDER BY date)
+                total_cost - LAG(total_cost) OVER (PARTITION BY currency ORDER BY date),
+                LAG(total_cost) OVER (PARTITION BY currency ORDER BY date)
             ) * 100 as cost_pct_change_from_prev_day
         FROM
-            `{self.source_table_ref}`
-        WHERE
-            date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days_back} DAY)
-            AND cost IS NOT NULL
-        GROUP BY
-            date,
-            currency
-        ORDER BY
-            date DESC
+            `{base_table_ref}`;
         """
-        
+    
+    def _drop_legacy_daily_trend_table(self):
+        """Drop daily_cost_trends if it is still a table; earlier versions materialized it and a view cannot replace it."""
+        table_ref = f"{self.project_id}.{self.output_dataset_id}.daily_cost_trends"
         try:
-            query_job = self.bq_client.query(query)
-            query_job.result()
-            logger.info(f"Successfully created daily cost trend report")
-            
-            # Add table description
-            table = self.bq_client.get_table(table_ref)
-            table.description = f"Daily cost trends with moving averages and day-over-day changes (last {days_back} days)"
-            self.bq_client.update_table(table, ["description"])
-            
-        except exceptions.GoogleAPIError as e:
-            logger.error(f"Error creating daily trend report: {e}")
-            raise
+            existing = self.bq_client.get_table(table_ref)
+            if existing.table_type == "TABLE":
+                logger.info(f"Dropping legacy daily_cost_trends table {table_ref}")
+                self.bq_client.delete_table(table_ref)
+        except exceptions.NotFound:
+            pass
     
-    def create_top_cost_drivers_report(self, days_back: int = 7, top_n: int = 20):
+    def _top_cost_drivers_sql(self, top_n: int = 20) -> str:
         """
-        Create a report of top cost drivers (SKUs) across all projects.
+        Build the statement for the top cost drivers (SKUs) report.
+        
+        The window is the @top_cost_drivers_days query parameter.
         
         Args:
-            days_back: Number of days to include in the report
             top_n: Number of top items to include
+            
+        Returns:
+            SQL statement for the report script
         """
         table_ref = f"{self.project_id}.{self.output_dataset_id}.top_cost_drivers"
-        logger.info(f"Creating top cost drivers report: {table_ref}")
         
-        query = f"""
-        CREATE OR REPLACE TABLE `{table_ref}` AS
+        # APPROX_TOP_SUM picks the top SKUs without globally sorting every SKU aggregate;
+        # exact figures are then computed only for those SKUs. It rejects negative
+        # weights, and billing exports carry negative adjustment rows, so rows are
+        # ranked on GREATEST(cost, 0) while the output keeps the exact SUM(cost).
+        return f"""
+        CREATE OR REPLACE TABLE `{table_ref}`
+        OPTIONS (description = FORMAT("Top {top_n} cost drivers by SKU (last %d days)", @top_cost_drivers_days))
+        AS
+        WITH sku_costs AS (
+            SELECT
+                *,
+                TO_JSON_STRING(STRUCT(service_description, sku_description, currency, usage_unit)) as sku_key
+            FROM
+                billing_window
+            WHERE
+                date >= DATE_SUB(CURRENT_DATE(), INTERVAL @top_cost_drivers_days DAY)
+                AND sku_description IS NOT NULL
+        ),
+        top_skus AS (
+            SELECT top.value as sku_key
+            FROM UNNEST((SELECT APPROX_TOP_SUM(sku_key, GREATEST(cost, 0), {top_n}) FROM sku_costs)) AS top
+        )
         SELECT
             service_description,
             sku_description,
@@ -390,50 +664,38 @@ class CostProcessor:
             currency,
             SUM(usage_amount) as total_usage,
             usage_unit,
-            ARRAY_AGG(DISTINCT project_id IGNORE NULLS LIMIT 10) as top_projects,
+            ARRAY(
+                SELECT top.value
+                FROM UNNEST(APPROX_TOP_SUM(project_id, GREATEST(cost, 0), 10)) AS top
+                WHERE top.value IS NOT NULL
+            ) as top_projects,
             MAX(collected_at) as last_updated
         FROM
-            `{self.source_table_ref}`
+            sku_costs
         WHERE
-            date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days_back} DAY)
-            AND cost IS NOT NULL
-            AND sku_description IS NOT NULL
+            sku_key IN (SELECT sku_key FROM top_skus)
         GROUP BY
             service_description,
             sku_description,
             currency,
             usage_unit
         ORDER BY
-            total_cost DESC
-        LIMIT {top_n}
+            total_cost DESC;
         """
-        
-        try:
-            query_job = self.bq_client.query(query)
-            query_job.result()
-            logger.info(f"Successfully created top cost drivers report")
-            
-            # Add table description
-            table = self.bq_client.get_table(table_ref)
-            table.description = f"Top {top_n} cost drivers by SKU (last {days_back} days)"
-            self.bq_client.update_table(table, ["description"])
-            
-        except exceptions.GoogleAPIError as e:
-            logger.error(f"Error creating top cost drivers report: {e}")
-            raise
     
-    def create_location_cost_report(self, days_back: int = 30):
+    def _location_cost_sql(self) -> str:
         """
-        Create a report of costs by location (region/zone).
+        Build the statement for the costs by location (region/zone) report.
         
-        Args:
-            days_back: Number of days to include in the report
+        Returns:
+            SQL statement for the report script
         """
         table_ref = f"{self.project_id}.{self.output_dataset_id}.location_cost_summary"
-        logger.info(f"Creating location cost summary report: {table_ref}")
         
-        query = f"""
-        CREATE OR REPLACE TABLE `{table_ref}` AS
+        return f"""
+        CREATE OR REPLACE TABLE `{table_ref}`
+        OPTIONS (description = FORMAT("Costs by geographic location (last %d days)", @days_back))
+        AS
         SELECT
             COALESCE(location_region, 'global') as region,
             location_zone,
@@ -445,30 +707,96 @@ class CostProcessor:
             currency,
             MAX(collected_at) as last_updated
         FROM
-            `{self.source_table_ref}`
+            billing_window
         WHERE
-            date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days_back} DAY)
-            AND cost IS NOT NULL
+            date >= window_start
         GROUP BY
             location_region,
             location_zone,
             currency
         ORDER BY
-            total_cost DESC
+            total_cost DESC;
+        """
+    
+    def _build_report_script(self) -> str:
+        """
+        Build the script that creates all BigQuery cost reports.
+        
+        The script text depends only on configuration fixed at startup; the
+        report windows are passed as the @days_back and @top_cost_drivers_days
+        query parameters, so the same script is reused on every run.
+        
+        Returns:
+            BigQuery script
+        """
+        return "\n".join([
+            f"""
+        DECLARE window_start DATE DEFAULT DATE_SUB(CURRENT_DATE(), INTERVAL @days_back DAY);
+        DECLARE refresh_from DATE;
+        
+        -- Single scan of the source for every report below
+        CREATE TEMP TABLE billing_window AS
+        SELECT
+            date,
+            billing_account_id,
+            billing_account_name,
+            project_id,
+            project_name,
+            service_description,
+            sku_description,
+            location_region,
+            location_zone,
+            cost,
+            credits,
+            currency,
+            usage_amount,
+            usage_unit,
+            collected_at
+        FROM
+            `{self.source_table_ref}`
+        WHERE
+            date >= LEAST(window_start, DATE_SUB(CURRENT_DATE(), INTERVAL @top_cost_drivers_days DAY))
+            AND cost IS NOT NULL;
+        """,
+            self._project_service_daily_sql(),
+            self._summary_reports_sql(),
+            self._daily_trend_sql(),
+            self._top_cost_drivers_sql(top_n=config.TOP_COST_DRIVERS_COUNT),
+            self._location_cost_sql(),
+        ])
+    
+        
+    def create_all_reports(self, days_back: int = 30):
+        """
+        Create all BigQuery cost reports in a single scripted job.
+        
+        Every report statement shares one script, so the reports pay the job
+        submission and scheduling overhead once instead of once per report.
+        The source table is scanned once into the billing_window temporary
+        table, holding only the columns and days the reports use, and every
+        report aggregates from that table.
+        
+        Args:
+            days_back: Number of days to include in the reports
         """
+        logger.info(f"Creating BigQuery cost reports in {self.project_id}.{self.output_dataset_id}")
         
         try:
-            query_job = self.bq_client.query(query)
-            query_job.result()
-            logger.info(f"Successfully created location cost summary report")
+            self._drop_legacy_daily_trend_table()
             
-            # Add table description
-            table = self.bq_client.get_table(table_ref)
-            table.description = f"Costs by geographic location (last {days_back} days)"
-            self.bq_client.update_table(table, ["description"])
+            job_config = bigquery.QueryJobConfig(
+                use_query_cache=False,
+                query_parameters=[
+                    bigquery.ScalarQueryParameter("days_back", "INT64", days_back),
+                    bigquery.ScalarQueryParameter("top_cost_drivers_days", "INT64", config.TOP_COST_DRIVERS_DAYS),
+                ]
+            )
+            query_job = self.bq_client.query(self.report_script, job_config=job_config)
+            query_job.result()
+            logger.info("Successfully created BigQuery cost reports")
             
         except exceptions.GoogleAPIError as e:
-            logger.error(f"Error creating location cost report: {e}")
+            logger.error(f"Error creating BigQuery cost reports: {e}")
             raise
     
     def get_processing_stats(self) -> Dict[str, Any]:
@@ -513,80 +841,260 @@ class CostProcessor:
             logger.error(f"Error getting processing stats: {e}")
             return {}
     
-    def save_report_to_firestore(self, report_name: str, query: str) -> Dict[str, Any]:
+    def _get_report_table(self, report_name: str) -> bigquery.Table:
         """
-        Execute a query and save results to Firestore.
+        Get a report's materialized BigQuery table.
         
         Args:
-            report_name: Name of the report (used as collection name)
-            query: BigQuery SQL query to execute
+            report_name: Name of the report (key of FIRESTORE_REPORT_TABLES)
             
         Returns:
-            Dictionary with save statistics
+            BigQuery table, including its current row count
         """
-        collection_name = f"{self.firestore_collection_prefix}_{report_name}"
-        logger.info(f"Saving {report_name} to Firestore collection: {collection_name}")
+        table_ref = f"{self.project_id}.{self.output_dataset_id}.{FIRESTORE_REPORT_TABLES[report_name]}"
+        return self.bq_client.get_table(table_ref)
+    
+    def _extract_report_to_gcs(self, report_name: str, table: bigquery.Table) -> str:
+        """
+        Extract a report table to GCS as gzipped newline-delimited JSON.
         
-        try:
-            # Execute query
-            query_job = self.bq_client.query(query)
-            results = query_job.result()
-            
-            # Get collection reference
-            collection_ref = self.firestore_client.collection(collection_name)
+        Each export is written under its own timestamped prefix, so shards from
+        an earlier, larger export never mix with the new ones and no existing
+        object is overwritten (which objectCreator alone does not allow).
+        
+        Args:
+            report_name: Name of the report
+            table: Report table to extract
             
-            # Batch write to Firestore
-            batch = self.firestore_client.batch()
-            batch_count = 0
-            total_count = 0
+        Returns:
+            Wildcard URI of the extracted files
+        """
+        run_timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+        destination_uri = (
+            f"gs://{config.REPORT_EXPORT_BUCKET}/{self.firestore_collection_prefix}/"
+            f"{report_name}/{run_timestamp}/*.json.gz"
+        )
+        job_config = bigquery.ExtractJobConfig(
+            destination_format=bigquery.DestinationFormat.NEWLINE_DELIMITED_JSON,
+            compression=bigquery.Compression.GZIP,
+        )
+        extract_job = self.bq_client.extract_table(
+            table, destination_uri, job_config=job_config, location=self.bq_location
+        )
+        extract_job.result()
+        return destination_uri
+    
+    async def _write_report_documents(
+        self,
+        collection_name: str,
+        report_name: str,
+        table: bigquery.Table
+    ) -> Set[str]:
+        """
+        Write every row of a report table to a Firestore collection.
+        
+        Results are streamed as Arrow record batches through the BigQuery
+        Storage Read API, with the next batch fetched while the current one
+        is written. Documents are grouped into write batches that are closed at
+        FIRESTORE_BATCH_MAX_OPS writes or FIRESTORE_BATCH_MAX_BYTES of estimated
+        encoded writes, whichever comes first, so wide rows stay under the commit
+        request size limit. Up to FIRESTORE_WRITE_CONCURRENCY batch commits are
+        kept in flight, and commits rejected for contention or throttling are
+        retried with exponential backoff.
+        
+        Args:
+            collection_name: Destination collection
+            report_name: Name of the report (selects the document ID fields)
+            table: Report table to read
             
-            for row in results:
-                # Convert row to dictionary
-                doc_data = dict(row)
-                
-                # Convert datetime/date objects to strings for Firestore
-                for key, value in doc_data.items():
-                    if isinstance(value, (datetime, )):
-                        doc_data[key] = value.isoformat()
-                    elif hasattr(value, 'isoformat'):  # date objects
-                        doc_data[key] = value.isoformat()
-                    elif value is None:
-                        doc_data[key] = None
+        Returns:
+            IDs of the documents written
+        """
+        # Read the materialized report table
+        results = await asyncio.to_thread(self.bq_client.list_rows, table, page_size=config.BQ_PAGE_SIZE)
+        
+        # Firestore stores dates/timestamps as ISO strings; find those columns once per report
+        time_columns = [field.name for field in results.schema if field.field_type in TIME_FIELD_TYPES]
+        
+        # Get collection reference
+        collection_ref = self.firestore_client.collection(collection_name)
+        
+        # Concurrent batch commits to Firestore, keeping up to FIRESTORE_WRITE_CONCURRENCY in flight
+        in_flight = set()
+        written_ids = set()
+        batch = self.firestore_client.batch()
+        batch_ops = 0
+        batch_bytes = 0
+        
+        # Read results as Arrow record batches over the Storage Read API, fetching
+        # the next batch in the background while the current one is written
+        batches = iter(results.to_arrow_iterable(bqstorage_client=self.bqstorage_client))
+        next_batch = asyncio.create_task(asyncio.to_thread(_fetch_next_batch, batches, time_columns))
+        
+        try:
+            while (rows := await next_batch) is not None:
+                next_batch = asyncio.create_task(asyncio.to_thread(_fetch_next_batch, batches, time_columns))
                 
-                # Create document ID based on report type
-                doc_id = self._generate_document_id(report_name, doc_data)
+                for doc_data in rows:
+                    # Create document ID based on report type
+                    doc_id = self._generate_document_id(report_name, doc_data)
+                    
+                    doc_ref = collection_ref.document(doc_id)
+                    write_bytes = _estimate_write_bytes(doc_ref.path, doc_data)
+                    
+                    # Close the batch before this write would push it over the byte limit
+                    if batch_ops and batch_bytes + write_bytes > config.FIRESTORE_BATCH_MAX_BYTES:
+                        in_flight.add(asyncio.create_task(batch.commit(retry=FIRESTORE_WRITE_RETRY)))
+                        batch = self.firestore_client.batch()
+                        batch_ops = 0
+                        batch_bytes = 0
+                    
+                    batch.set(doc_ref, doc_data)
+                    batch_ops += 1
+                    batch_bytes += write_bytes
+                    written_ids.add(doc_id)
+                    
+                    if batch_ops >= config.FIRESTORE_BATCH_MAX_OPS:
+                        in_flight.add(asyncio.create_task(batch.commit(retry=FIRESTORE_WRITE_RETRY)))
+                        batch = self.firestore_client.batch()
+                        batch_ops = 0
+                        batch_bytes = 0
+                    
+                    if len(in_flight) >= config.FIRESTORE_WRITE_CONCURRENCY:
+                        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                        # gather retrieves every finished commit's exception, not just the first
+                        await asyncio.gather(*done)
+            
+            # Commit the last partial batch and wait for remaining commits
+            if batch_ops:
+                in_flight.add(asyncio.create_task(batch.commit(retry=FIRESTORE_WRITE_RETRY)))
+            if in_flight:
+                await asyncio.gather(*in_flight)
+                logger.debug(f"Committed final {len(in_flight)} batches to {collection_name}")
+        finally:
+            # After a failure, stop the other commits (and the prefetch) before the
+            # error propagates; a retried save must not overlap with them
+            await _cancel_tasks([*in_flight, next_batch])
+        
+        return written_ids
+    
+    async def _delete_stale_documents(self, collection_name: str, keep_ids: Set[str]) -> int:
+        """
+        Delete the documents of a report collection that were not written by this run.
+        
+        Report documents are overwritten by ID, so rows that left the report
+        (and documents written under an earlier document ID scheme) would
+        otherwise stay in the collection with their old figures. Only document
+        names are read, and deletes are committed in batches of
+        FIRESTORE_BATCH_MAX_OPS with up to FIRESTORE_WRITE_CONCURRENCY commits
+        in flight.
+        
+        Args:
+            collection_name: Report collection
+            keep_ids: IDs of the documents to keep
+            
+        Returns:
+            Number of documents deleted
+        """
+        collection_ref = self.firestore_client.collection(collection_name)
+        
+        in_flight = set()
+        deleted = 0
+        batch = self.firestore_client.batch()
+        batch_ops = 0
+        
+        try:
+            async for doc in collection_ref.select([]).stream():
+                if doc.id in keep_ids:
+                    continue
                 
-                # Add to batch
-                doc_ref = collection_ref.document(doc_id)
-                batch.set(doc_ref, doc_data)
-                batch_count += 1
-                total_count += 1
+                batch.delete(doc.reference)
+                batch_ops += 1
+                deleted += 1
                 
-                # Commit batch every 500 documents (Firestore limit)
-                if batch_count >= 500:
-                    batch.commit()
-                    logger.debug(f"Committed batch of {batch_count} documents")
+                if batch_ops >= config.FIRESTORE_BATCH_MAX_OPS:
+                    in_flight.add(asyncio.create_task(batch.commit(retry=FIRESTORE_WRITE_RETRY)))
                     batch = self.firestore_client.batch()
-                    batch_count = 0
+                    batch_ops = 0
+                
+                if len(in_flight) >= config.FIRESTORE_WRITE_CONCURRENCY:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    await asyncio.gather(*done)
             
-            # Commit remaining documents
-            if batch_count > 0:
-                batch.commit()
-                logger.debug(f"Committed final batch of {batch_count} documents")
+            if batch_ops:
+                in_flight.add(asyncio.create_task(batch.commit(retry=FIRESTORE_WRITE_RETRY)))
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            # After a failure, stop the other commits before the error propagates
+            await _cancel_tasks(in_flight)
+        
+        return deleted
+    
+    async def save_report_to_firestore(self, report_name: str) -> Dict[str, Any]:
+        """
+        Save a report's BigQuery table to Firestore.
+        
+        The rows are read straight from the table written by the create_*
+        report methods, so the aggregation is not run a second time. BigQuery
+        calls run in worker threads so several reports can be exported
+        concurrently on one event loop.
+        
+        When REPORT_EXPORT_BUCKET is set and the table has more than
+        FIRESTORE_MAX_REPORT_ROWS rows, the rows are extracted to GCS as
+        newline-delimited JSON instead, the report's collection is emptied, and
+        only the metadata document (with the export URI) is written to Firestore.
+        
+        Documents left in the collection by earlier runs whose rows are no
+        longer in the report are deleted once the new documents are written.
+        
+        Args:
+            report_name: Name of the report (used as collection name)
             
-            logger.info(f"Saved {total_count} documents to {collection_name}")
+        Returns:
+            Dictionary with save statistics
+        """
+        collection_name = f"{self.firestore_collection_prefix}_{report_name}"
+        logger.info(f"Saving {report_name} to Firestore collection: {collection_name}")
+        
+        try:
+            table = await asyncio.to_thread(self._get_report_table, report_name)
             
-            # Save metadata
             metadata = {
                 'report_name': report_name,
                 'collection_name': collection_name,
-                'document_count': total_count,
-                'last_updated': datetime.utcnow().isoformat(),
-                'environment': config.ENVIRONMENT,
+                'row_count': table.num_rows,
             }
             
+            if config.REPORT_EXPORT_BUCKET and 0 < config.FIRESTORE_MAX_REPORT_ROWS < table.num_rows:
+                # Too large to write row by row; hand the rows off through GCS instead
+                logger.info(
+                    f"{report_name} has {table.num_rows} rows (limit {config.FIRESTORE_MAX_REPORT_ROWS}); "
+                    f"extracting to gs://{config.REPORT_EXPORT_BUCKET} instead of Firestore"
+                )
+                metadata['export_uri'] = await asyncio.to_thread(self._extract_report_to_gcs, report_name, table)
+                metadata['document_count'] = 0
+                logger.info(f"Extracted {report_name} to {metadata['export_uri']}")
+                
+                # Documents from earlier Firestore exports would hold stale figures
+                deleted = await self._delete_stale_documents(collection_name, set())
+                if deleted:
+                    logger.info(f"Deleted {deleted} documents from {collection_name} superseded by the GCS export")
+            else:
+                written_ids = await self._write_report_documents(collection_name, report_name, table)
+                metadata['document_count'] = len(written_ids)
+                logger.info(f"Saved {metadata['document_count']} documents to {collection_name}")
+                
+                deleted = await self._delete_stale_documents(collection_name, written_ids)
+                if deleted:
+                    logger.info(f"Deleted {deleted} stale documents from {collection_name}")
+            
+            metadata['last_updated'] = datetime.utcnow().isoformat()
+            metadata['environment'] = config.ENVIRONMENT
+            
+            # Save metadata
             metadata_ref = self.firestore_client.collection('cost_reports_metadata').document(report_name)
-            metadata_ref.set(metadata)
+            await metadata_ref.set(metadata)
             
             return metadata
             
@@ -594,165 +1102,55 @@ class CostProcessor:
             logger.error(f"Error saving {report_name} to Firestore: {e}")
             raise
     
-    def _generate_document_id(self, report_name: str, doc_data: Dict[str, Any]) -> str:
+    async def save_reports_to_firestore(self, report_names: List[str]) -> List[Dict[str, Any]]:
         """
-        Generate a unique document ID based on report type and data.
+        Save several reports to Firestore concurrently.
+        
+        Each report save is retried with exponential backoff on transient
+        errors. A report that still fails is logged and does not cancel the
+        others. Results are collected as each report finishes.
         
         Args:
-            report_name: Name of the report
-            doc_data: Document data
+            report_names: Names of the reports to save
             
         Returns:
-            Document ID string
+            List of metadata dictionaries for the reports that were saved
         """
-        if report_name == 'project_cost_summary':
-            return f"{doc_data.get('project_id', 'unknown')}"
-        elif report_name == 'service_cost_summary':
-            service = doc_data.get('service_description', 'unknown').replace('/', '_')
-            return f"{service}"
-        elif report_name == 'project_service_cost_summary':
-            project = doc_data.get('project_id', 'unknown')
-            service = doc_data.get('service_description', 'unknown').replace('/', '_')
-            return f"{project}_{service}"
-        elif report_name == 'daily_cost_trends':
-            date = doc_data.get('date', 'unknown')
-            return f"{date}"
-        elif report_name == 'top_cost_drivers':
-            service = doc_data.get('service_description', 'unknown').replace('/', '_')
-            sku = doc_data.get('sku_description', 'unknown').replace('/', '_')[:50]
-            return f"{service}_{sku}"
-        elif report_name == 'location_cost_summary':
-            region = doc_data.get('region', 'unknown')
-            zone = doc_data.get('location_zone', 'none')
-            return f"{region}_{zone}"
-        else:
-            # Default: use timestamp-based ID
-            return f"{datetime.utcnow().timestamp()}"
+        async def save(report_name: str) -> Optional[Dict[str, Any]]:
+            try:
+                return await FIRESTORE_REPORT_RETRY(self.save_report_to_firestore)(report_name)
+            except Exception as e:
+                logger.error(f"Failed to save {report_name} to Firestore: {e}")
+                return None
+        
+        firestore_stats = []
+        for completed in asyncio.as_completed([save(report_name) for report_name in report_names]):
+            metadata = await completed
+            if metadata:
+                logger.info(f"Finished {metadata['report_name']} ({len(firestore_stats) + 1}/{len(report_names)})")
+                firestore_stats.append(metadata)
+        
+        return firestore_stats
     
-    def get_report_query(self, report_name: str, days_back: int) -> str:
+    def _generate_document_id(self, report_name: str, doc_data: Dict[str, Any]) -> str:
         """
-        Get the query for a specific report.
+        Generate a unique document ID based on report type and data.
         
         Args:
             report_name: Name of the report
-            days_back: Number of days to include
+            doc_data: Document data
             
         Returns:
-            SQL query string
+            Document ID string
         """
-        if report_name == 'project_cost_summary':
-            return f"""
-            SELECT
-                project_id,
-                project_name,
-                billing_account_id,
-                billing_account_name,
-                MIN(date) as first_cost_date,
-                MAX(date) as last_cost_date,
-                COUNT(DISTINCT date) as days_with_costs,
-                SUM(cost) as total_cost,
-                SUM(credits) as total_credits,
-                SUM(cost) + SUM(credits) as net_cost,
-                AVG(cost) as avg_daily_cost,
-                currency,
-                COUNT(DISTINCT service_description) as service_count,
-                MAX(collected_at) as last_updated
-            FROM `{self.source_table_ref}`
-            WHERE date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days_back} DAY)
-                AND cost IS NOT NULL
-                AND project_id IS NOT NULL
-            GROUP BY project_id, project_name, billing_account_id, billing_account_name, currency
-            ORDER BY total_cost DESC
-            """
-        elif report_name == 'service_cost_summary':
-            return f"""
-            SELECT
-                service_description,
-                COUNT(DISTINCT project_id) as project_count,
-                SUM(cost) as total_cost,
-                SUM(credits) as total_credits,
-                SUM(cost) + SUM(credits) as net_cost,
-                currency,
-                MAX(collected_at) as last_updated
-            FROM `{self.source_table_ref}`
-            WHERE date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days_back} DAY)
-                AND cost IS NOT NULL
-                AND service_description IS NOT NULL
-            GROUP BY service_description, currency
-            ORDER BY total_cost DESC
-            """
-        elif report_name == 'project_service_cost_summary':
-            return f"""
-            SELECT
-                project_id,
-                project_name,
-                service_description,
-                SUM(cost) as total_cost,
-                SUM(credits) as total_credits,
-                SUM(cost) + SUM(credits) as net_cost,
-                currency,
-                MAX(collected_at) as last_updated,
-                SUM(cost) / SUM(SUM(cost)) OVER (PARTITION BY project_id) * 100 as pct_of_project_cost
-            FROM `{self.source_table_ref}`
-            WHERE date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days_back} DAY)
-                AND cost IS NOT NULL
-                AND project_id IS NOT NULL
-                AND service_description IS NOT NULL
-            GROUP BY project_id, project_name, service_description, currency
-            ORDER BY project_id, total_cost DESC
-            """
-        elif report_name == 'daily_cost_trends':
-            return f"""
-            SELECT
-                date,
-                COUNT(DISTINCT project_id) as active_projects,
-                SUM(cost) as total_cost,
-                SUM(credits) as total_credits,
-                SUM(cost) + SUM(credits) as net_cost,
-                currency,
-                MAX(collected_at) as last_updated
-            FROM `{self.source_table_ref}`
-            WHERE date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days_back} DAY)
-                AND cost IS NOT NULL
-            GROUP BY date, currency
-            ORDER BY date DESC
-            """
-        elif report_name == 'top_cost_drivers':
-            return f"""
-            SELECT
-                service_description,
-                sku_description,
-                COUNT(DISTINCT project_id) as project_count,
-                SUM(cost) as total_cost,
-                SUM(credits) as total_credits,
-                currency,
-                MAX(collected_at) as last_updated
-            FROM `{self.source_table_ref}`
-            WHERE date >= DATE_SUB(CURRENT_DATE(), INTERVAL {config.TOP_COST_DRIVERS_DAYS} DAY)
-                AND cost IS NOT NULL
-                AND sku_description IS NOT NULL
-            GROUP BY service_description, sku_description, currency
-            ORDER BY total_cost DESC
-            LIMIT {config.TOP_COST_DRIVERS_COUNT}
-            """
-        elif report_name == 'location_cost_summary':
-            return f"""
-            SELECT
-                COALESCE(location_region, 'global') as region,
-                location_zone,
-                COUNT(DISTINCT project_id) as project_count,
-                SUM(cost) as total_cost,
-                SUM(credits) as total_credits,
-                currency,
-                MAX(collected_at) as last_updated
-            FROM `{self.source_table_ref}`
-            WHERE date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days_back} DAY)
-                AND cost IS NOT NULL
-            GROUP BY location_region, location_zone, currency
-            ORDER BY total_cost DESC
-            """
-        else:
-            raise ValueError(f"Unknown report name: {report_name}")
+        key_fields = DOCUMENT_ID_FIELDS.get(report_name)
+        if key_fields is None:
+            # Default: use timestamp-based ID
+            return f"{datetime.utcnow().timestamp()}"
+        
+        return "_".join(
+            str(doc_data.get(field) or default) for field, default in key_fields
+        ).translate(DOCUMENT_ID_TRANSLATION)
     
     def run(self, days_back: int = 30):
         """
@@ -777,20 +1175,12 @@ class CostProcessor:
             # Create all BigQuery reports
             logger.info("Creating BigQuery cost reports...")
             
-            self.create_project_service_daily_report(days_back)
-            self.create_project_summary_report(days_back)
-            self.create_service_summary_report(days_back)
-            self.create_project_service_summary_report(days_back)
-            self.create_daily_trend_report(days_back)
-            self.create_top_cost_drivers_report(days_back=config.TOP_COST_DRIVERS_DAYS, top_n=config.TOP_COST_DRIVERS_COUNT)
-            self.create_location_cost_report(days_back)
+            self.create_all_reports(days_back)
             
             logger.info("BigQuery reports created successfully")
             
             # Save key reports to Firestore
-            logger.info("=" * 80)
-            logger.info("Saving reports to Firestore...")
-            logger.info("=" * 80)
+            logger.info(f"{'=' * 80}\nSaving reports to Firestore...\n{'=' * 80}")
             
             reports_to_save = [
                 'project_cost_summary',
@@ -801,42 +1191,55 @@ class CostProcessor:
                 'location_cost_summary',
             ]
             
-            firestore_stats = []
-            for report_name in reports_to_save:
-                try:
-                    query = self.get_report_query(report_name, days_back)
-                    metadata = self.save_report_to_firestore(report_name, query)
-                    firestore_stats.append(metadata)
-                except Exception as e:
-                    logger.error(f"Failed to save {report_name} to Firestore: {e}")
+            firestore_stats = asyncio.run(self.save_reports_to_firestore(reports_to_save))
             
-            logger.info("=" * 80)
-            logger.info("Cost processing completed successfully!")
-            logger.info("=" * 80)
-            logger.info("Generated BigQuery Reports:")
-            logger.info(f"  1. project_service_daily_costs - Daily costs by project and service")
-            logger.info(f"  2. project_cost_summary - Total costs by project")
-            logger.info(f"  3. service_cost_summary - Total costs by service")
-            logger.info(f"  4. project_service_cost_summary - Detailed project-service breakdown")
-            logger.info(f"  5. daily_cost_trends - Daily trends with moving averages")
-            logger.info(f"  6. top_cost_drivers - Top {config.TOP_COST_DRIVERS_COUNT} cost drivers by SKU")
-            logger.info(f"  7. location_cost_summary - Costs by geographic location")
-            logger.info("")
-            logger.info("Firestore Collections:")
-            for stat in firestore_stats:
-                logger.info(f"  - {stat['collection_name']}: {stat['document_count']} documents")
-            logger.info("=" * 80)
+            collection_lines = "".join(
+                f"\n  - {stat['collection_name']}: {stat['document_count']} documents" for stat in firestore_stats
+            )
+            logger.info(
+                f"{'=' * 80}\n"
+                f"Cost processing completed successfully!\n"
+                f"{'=' * 80}\n"
+                f"Generated BigQuery Reports:\n"
+                f"  1. project_service_daily_costs - Daily costs by project and service\n"
+                f"  2. project_cost_summary - Total costs by project\n"
+                f"  3. service_cost_summary - Total costs by service\n"
+                f"  4. project_service_cost_summary - Detailed project-service breakdown\n"
+                f"  5. daily_cost_trends - Daily trends with moving averages\n"
+                f"  6. top_cost_drivers - Top {config.TOP_COST_DRIVERS_COUNT} cost drivers by SKU\n"
+                f"  7. location_cost_summary - Costs by geographic location\n"
+                f"\n"
+                f"Firestore Collections:{collection_lines}\n"
+                f"{'=' * 80}"
+            )
             
         except Exception as e:
             logger.error(f"Error in cost data processing: {e}")
             raise
 
 
+def start_queue_logging() -> logging.handlers.QueueListener:
+    """
+    Route root logger output through a queue drained by a background thread.
+    
+    Worker threads and the event loop only enqueue records, instead of
+    formatting and writing to stderr under the handler lock themselves.
+    
+    Returns:
+        The started listener; stop it to flush remaining records
+    """
+    root_logger = logging.getLogger()
+    log_queue = queue.Queue()
+    listener = logging.handlers.QueueListener(log_queue, *root_logger.handlers, respect_handler_level=True)
+    root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    listener.start()
+    return listener
+
+
 def main():
     """Main entry point for the Cloud Run job."""
-    logger.info("=" * 80)
-    logger.info("Starting GCP Cost Data Processing Job")
-    logger.info("=" * 80)
+    listener = start_queue_logging()
+    logger.info(f"{'=' * 80}\nStarting GCP Cost Data Processing Job\n{'=' * 80}")
     
     try:
         # Get days_back from config
@@ -849,6 +1252,9 @@ def main():
     except Exception as e:
         logger.error(f"Job failed with error: {e}")
         raise
+    
+    finally:
+        listener.stop()
 
 
 if __name__ == "__main__":
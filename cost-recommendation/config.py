@@ -8,15 +8,6 @@ from typing import List, Optional, Union
 from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, field_validator
-from dotenv import load_dotenv
-
-# Explicitly load .env files to ensure they are present in os.environ
-# This helps if Pydantic's env_file logic is bypassed or behaves differently
-# Load specific environment file FIRST (e.g., .env.dev) so it takes precedence over .env
-# but does NOT override system environment variables.
-env_name = os.getenv('APP_ENV') or os.getenv('ENVIRONMENT') or 'dev'
-load_dotenv(f".env.{env_name.lower()}")
-load_dotenv() # Load generic .env as fallback
 
 class Settings(BaseSettings):
     """Base settings for the application."""
@@ -79,6 +70,8 @@ class Settings(BaseSettings):
     recommender_types: Union[str, List[str]] = Field(default_factory=list)
     recommendation_state_filter: str = "ACTIVE"
     recommender_locations: Union[str, List[str]] = Field(default=["global"])
+    filter_by_enabled_services: bool = True
+    store_recommendation_content: bool = False
     
     @field_validator('recommender_types', 'recommender_locations', mode='before')
     @classmethod
@@ -90,8 +83,19 @@ class Settings(BaseSettings):
         return v
     
     # Performance Configuration
-    max_workers: int = 10
-    firestore_batch_size: int = 500
+    max_workers: int = Field(default=10, ge=1)
+    process_workers: int = 1
+    recommender_max_concurrency: int = Field(default=32, ge=1)
+    recommender_calls_per_project: int = Field(default=8, ge=1)
+    # A Firestore commit accepts at most 500 writes
+    firestore_batch_size: int = Field(default=50, ge=1, le=500)
+    firestore_write_concurrency: int = Field(default=10, ge=1)
+    skip_unchanged_recommendations: bool = True
+    # Must be bounded: a Queue maxsize of 0 or less would remove the backpressure
+    write_queue_size: int = Field(default=1000, ge=1)
+    
+    # JSON file that keeps resolved project numbers between runs (empty = disabled)
+    project_number_cache_file: str = ""
     
     # Cleanup Configuration
     stale_cleanup_days: int = 4
@@ -150,9 +154,13 @@ class ProdSettings(Settings):
         extra="ignore"
     )
 
+def get_env_name() -> str:
+    """Return the configured environment name (APP_ENV or ENVIRONMENT, default dev)."""
+    return (os.getenv("APP_ENV") or os.getenv("ENVIRONMENT") or "dev").lower()
+
 def get_settings_class():
     """Determine the settings class based on the environment."""
-    env = (os.getenv("APP_ENV") or os.getenv("ENVIRONMENT") or "dev").lower()
+    env = get_env_name()
     settings_map = {
         "local": LocalSettings,
         "dev": DevSettings,
@@ -163,9 +171,29 @@ def get_settings_class():
 
 @lru_cache()
 def get_settings() -> Settings:
-    """Return a cached instance of the settings."""
+    """
+    Return a cached instance of the settings.
+    
+    Callers should always go through this function rather than instantiating
+    the settings classes, so .env files are parsed only once per process.
+    Values are read from the settings class's own file (e.g. .env.dev, which
+    also fills in keys missing for environments that fall back to
+    DevSettings, such as prd), then the generic .env file, then the
+    environment specific file (e.g. .env.prd), each overriding the previous
+    one, with real environment variables taking precedence.
+    """
     settings_class = get_settings_class()
-    return settings_class()
+    env_files = [settings_class.model_config["env_file"], ".env", f".env.{get_env_name()}"]
+    # A file listed twice only counts at its highest precedence
+    env_files = [f for i, f in enumerate(env_files) if f not in env_files[i + 1:]]
+    return settings_class(_env_file=tuple(env_files))
 
-# For backward compatibility during refactor if needed, but main.py should use get_settings()
-CONFIG = get_settings().model_dump()
+@lru_cache()
+def get_config_dict() -> dict:
+    """
+    Return the cached settings as a plain dictionary (e.g. for logging).
+    
+    Code that reads settings should use get_settings(), which keeps the
+    validated, typed values.
+    """
+    return get_settings().model_dump()
@@ -5,17 +5,32 @@ and store them in Firestore. Runs daily to collect active recommendations.
 """
 
 import os
+import re
+import time
+import asyncio
+import multiprocessing
 import logging
 import json
-from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Union
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date, timedelta, timezone
+from functools import lru_cache
+from typing import List, Dict, Any, AsyncIterator, Optional, Union
 
 from google.cloud import recommender_v1
 from google.cloud import firestore
+from google.cloud.firestore_v1 import _helpers as firestore_helpers
+from google.cloud.firestore_v1.services.firestore import FirestoreAsyncClient
+from google.cloud.firestore_v1.services.firestore.transports import FirestoreGrpcAsyncIOTransport
+from google.cloud.firestore_v1.types import Document, Write
 from google.cloud import resourcemanager_v3
+from google.cloud import service_usage_v1
+from google.cloud.recommender_v1.services.recommender.transports import RecommenderGrpcAsyncIOTransport
+from google.cloud.service_usage_v1.services.service_usage.transports import ServiceUsageGrpcAsyncIOTransport
+from google.cloud.resourcemanager_v3.services.projects.transports import ProjectsGrpcTransport, ProjectsGrpcAsyncIOTransport
 from google.api_core import exceptions
+from google.api_core import retry_async
+from google.protobuf.json_format import MessageToDict
 
 # Import configuration
 from config import get_settings
@@ -34,21 +49,262 @@ logger = logging.getLogger(__name__)
 logger.info(f"Starting with environment: {settings.environment}")
 logger.debug(f"Configuration: {settings.model_dump()}")
 
+# Options of the gRPC channels used by the API clients. Keepalive pings
+# keep the long-lived connections open between bursts of calls instead of
+# reconnecting after idle periods; message size limits match the client defaults.
+GRPC_CHANNEL_OPTIONS = [
+    ('grpc.max_send_message_length', -1),
+    ('grpc.max_receive_message_length', -1),
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+]
+
+# Backoff for Firestore batch commits that fail with transient errors
+FIRESTORE_WRITE_RETRY = retry_async.AsyncRetry(
+    predicate=retry_async.if_exception_type(
+        exceptions.Aborted,
+        exceptions.DeadlineExceeded,
+        exceptions.InternalServerError,
+        exceptions.ResourceExhausted,
+        exceptions.ServiceUnavailable,
+    ),
+    initial=1.0,
+    maximum=60.0,
+    multiplier=2.0,
+    deadline=300.0,
+)
+
+# Serializes the JSON string fields of a record. orjson is a C extension
+# several times faster than the stdlib encoder; both produce compact JSON
+# with non-ASCII characters kept as is. Without orjson, one stdlib encoder
+# is reused for every record instead of json.dumps setting one up per call.
+try:
+    import orjson
+    
+    def encode_json(value: Any) -> str:
+        return orjson.dumps(value).decode()
+except ImportError:
+    encode_json = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+# Stored fields compared with a fetched record to decide whether it changed
+UNCHANGED_FIELDS = ('etag', 'last_updated', 'app_code', 'bu_code')
+
+# Project IDs combined into one search_projects query when resolving project numbers
+PROJECT_SEARCH_CHUNK_SIZE = 50
+
+# Recommendations requested per list_recommendations page. Large pages
+# save a round trip per extra page for recommenders with many results.
+RECOMMENDATIONS_PAGE_SIZE = 1000
+
+# Number of queued documents between progress logs of the Firestore writer
+PROGRESS_LOG_INTERVAL = 1000
+
+# Kinds of location each recommender type is published in. Only configured
+# locations of these kinds are queried; types not listed are queried in
+# every configured location.
+RECOMMENDER_LOCATION_KINDS = {
+    'google.compute.instance.MachineTypeRecommender': {'zone'},
+    'google.compute.instance.IdleResourceRecommender': {'zone'},
+    'google.compute.disk.IdleResourceRecommender': {'region', 'zone'},
+    'google.compute.address.IdleResourceRecommender': {'global', 'region'},
+    'google.compute.image.IdleResourceRecommender': {'global'},
+    'google.compute.instanceGroupManager.MachineTypeRecommender': {'region', 'zone'},
+    'google.compute.commitment.UsageCommitmentRecommender': {'region'},
+    'google.cloudsql.instance.IdleRecommender': {'region'},
+    'google.cloudsql.instance.OverprovisionedRecommender': {'region'},
+    'google.cloudsql.instance.OutOfDiskRecommender': {'region'},
+    'google.logging.productSuggestion.ContainerRecommender': {'global'},
+    'google.monitoring.productSuggestion.ComputeRecommender': {'global'},
+    'google.storage.bucket.LifecycleRecommender': {'global'},
+    'google.storage.bucket.SoftDeleteRecommender': {'global'},
+    'google.container.DiagnosisRecommender': {'region', 'zone'},
+    'google.run.service.CostRecommender': {'region'},
+    'google.run.service.IdentityRecommender': {'region'},
+    'google.resourcemanager.project.IdleRecommender': {'global'},
+    'google.cloudbilling.commitment.SpendBasedCommitmentRecommender': {'global'},
+}
+
+# Recommender types checked when RECOMMENDER_TYPES is not configured. The
+# Recommender API has no "list recommenders" method, so this is a
+# comprehensive list of known recommender types.
+KNOWN_RECOMMENDER_TYPES = (
+    # Compute Engine
+    'google.compute.instance.MachineTypeRecommender',
+    'google.compute.disk.IdleResourceRecommender',
+    'google.compute.instance.IdleResourceRecommender',
+    'google.compute.address.IdleResourceRecommender',
+    'google.compute.image.IdleResourceRecommender',
+    'google.compute.instanceGroupManager.MachineTypeRecommender',
+    
+    # Cloud SQL
+    'google.cloudsql.instance.IdleRecommender',
+    'google.cloudsql.instance.OverprovisionedRecommender',
+    'google.cloudsql.instance.OutOfDiskRecommender',
+    
+    # Logging
+    'google.logging.productSuggestion.ContainerRecommender',
+    
+    # BigQuery
+    'google.bigquery.capacityCommitments.Recommender',
+    'google.bigquery.table.PartitionClusterRecommender',
+    
+    # Cloud Storage
+    'google.storage.bucket.LifecycleRecommender',
+    'google.storage.bucket.SoftDeleteRecommender',
+    
+    # GKE
+    'google.container.DiagnosisRecommender',
+    
+    # Monitoring
+    'google.monitoring.productSuggestion.ComputeRecommender',
+    
+    # App Engine
+    'google.appengine.applicationIdleRecommender',
+    
+    # Cloud Run
+    'google.run.service.CostRecommender',
+    'google.run.service.IdentityRecommender',
+    
+    # Cloud Functions
+    'google.cloudfunctions.PerformanceRecommender',
+    
+    # Firestore
+    'google.firestore.index.Recommender',
+    
+    # Spanner
+    'google.spanner.instance.IdleRecommender',
+    
+    # Resource Manager
+    'google.resourcemanager.project.IdleRecommender',
+    
+    # Committed Use Discounts
+    'google.compute.commitment.UsageCommitmentRecommender',
+    
+    # GKE Workload Rightsizing
+    'google.container.workload.RightSizingRecommender',
+)
+
+# Services of which at least one must be enabled in a project for recommender
+# types with each prefix to have recommendations, most specific prefix first.
+# Only mappings known to hold for every project are listed; types matching no
+# prefix (e.g. storage, BigQuery, App Engine, Firestore, project and billing
+# recommenders, whose resources can exist without the listed API enabled) are
+# always queried.
+RECOMMENDER_SERVICES = [
+    ('google.logging.productSuggestion.ContainerRecommender', frozenset({'container.googleapis.com'})),
+    ('google.monitoring.productSuggestion.ComputeRecommender', frozenset({'compute.googleapis.com'})),
+    ('google.compute.', frozenset({'compute.googleapis.com'})),
+    ('google.cloudsql.', frozenset({'sqladmin.googleapis.com'})),
+    ('google.container.', frozenset({'container.googleapis.com'})),
+    ('google.run.', frozenset({'run.googleapis.com'})),
+    ('google.cloudfunctions.', frozenset({'cloudfunctions.googleapis.com'})),
+    ('google.spanner.', frozenset({'spanner.googleapis.com'})),
+]
+
+# Response fields read when listing the enabled services of a project.
+# Service names have the form projects/{project_number}/services/{service}.
+ENABLED_SERVICES_FIELD_MASK = 'services.name,next_page_token'
+
+ZONE_PATTERN = re.compile(r'^[a-z]+-[a-z]+\d+-[a-z]$')
+
+
+@lru_cache(maxsize=None)
+def get_projects_client() -> resourcemanager_v3.ProjectsClient:
+    """
+    Return the process-wide Resource Manager client.
+    
+    Used for project listing, which runs in a worker thread; project
+    number lookups use the async client created on the event loop.
+    """
+    return resourcemanager_v3.ProjectsClient(
+        transport=ProjectsGrpcTransport(
+            channel=ProjectsGrpcTransport.create_channel(options=GRPC_CHANNEL_OPTIONS)
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def get_firestore_client(database: str) -> firestore.Client:
+    """Return the process-wide synchronous Firestore client for a database."""
+    return firestore.Client(project=settings.gcp_project_id, database=database)
+
+
+def location_kind(location: str) -> str:
+    """Classify a location as 'global', 'zone' (e.g. asia-south1-a) or 'region'."""
+    if location == 'global':
+        return 'global'
+    return 'zone' if ZONE_PATTERN.match(location) else 'region'
+
+
+def required_services(recommender_type: str) -> Optional[frozenset]:
+    """Return the services of which a recommender type needs one enabled, or None if it applies to every project."""
+    for prefix, services in RECOMMENDER_SERVICES:
+        if recommender_type.startswith(prefix):
+            return services
+    return None
+
+
+def supported_locations(recommender_type: str, locations: List[str]) -> List[str]:
+    """Return the configured locations in which a recommender type can have recommendations."""
+    kinds = RECOMMENDER_LOCATION_KINDS.get(recommender_type)
+    if kinds is None:
+        return locations
+    return [location for location in locations if location_kind(location) in kinds]
+
 
 class CostRecommendationCollector:
     """Collects cost recommendations from all GCP projects and stores in Firestore."""
     
     def __init__(self):
         """Initialize the recommender and Firestore clients."""
-        self.recommender_client = recommender_v1.RecommenderClient()
-        self.db = firestore.Client(project=settings.gcp_project_id, database=settings.firestore_database)
-        self.projects_client = resourcemanager_v3.ProjectsClient()
+        self.projects_client = get_projects_client()
+        
+        # The async recommender, Resource Manager, service usage and Firestore clients, the limit
+        # on concurrent recommender calls and the write queue are bound to the
+        # event loop, so run_async creates them
+        self.db: Optional[firestore.AsyncClient] = None
+        self.projects_async_client: Optional[resourcemanager_v3.ProjectsAsyncClient] = None
+        self.firestore_api: Optional[FirestoreAsyncClient] = None
+        self.recommender_client: Optional[recommender_v1.RecommenderAsyncClient] = None
+        self.service_usage_client: Optional[service_usage_v1.ServiceUsageAsyncClient] = None
+        self.fetch_semaphore: Optional[asyncio.Semaphore] = None
+        # Lists of parsed records waiting for the Firestore writer. Bounded so
+        # that fetching blocks instead of buffering when writes fall behind.
+        self.write_queue: Optional[asyncio.Queue] = None
+        
+        # (recommender type, location) pairs the API rejected as not found or
+        # invalid for two different projects, so later projects skip them. A
+        # single rejection may be caused by the project itself (a deleted or
+        # malformed ID), so the first rejecting project is only remembered in
+        # _unsupported_candidates until a second project confirms it.
+        self._unsupported = set()
+        self._unsupported_candidates: Dict[tuple, str] = {}
+        
+        # Project numbers by project ID, filled by lookups and project listing.
+        # Numbers never change, so they are also kept in a file between runs
+        # when project_number_cache_file is set.
+        self.project_number_cache_file = settings.project_number_cache_file
+        self._project_numbers: Dict[str, str] = self._load_project_numbers()
+        
+        # Enabled services per project number; None when they could not be listed
+        self._enabled_services: Dict[str, Optional[set]] = {}
+        
+        # Date stamped as last_updated on every record, computed once per run
+        self.run_date = date.today().isoformat()
         
         # Get configuration from settings
         self.project_id = settings.gcp_project_id
         self.collection_name = settings.firestore_collection
+        # Resource names of the database and of documents in the collection, for Commit requests
+        self.database_path = f"projects/{settings.gcp_project_id}/databases/{settings.firestore_database}"
+        self.document_prefix = f"{self.database_path}/documents/{self.collection_name}/"
         self.recommender_types = settings.recommender_types
         self.state_filter = settings.recommendation_state_filter
+        # The filter expression is the same for every list_recommendations call
+        self.state_filter_expr = f"stateInfo.state={self.state_filter}" if self.state_filter else None
+        self.filter_by_enabled_services = settings.filter_by_enabled_services
         
         # Inventory configuration
         self.use_inventory = settings.use_inventory_collection
@@ -60,7 +316,15 @@ class CostRecommendationCollector:
         
         # Performance configuration
         self.max_workers = settings.max_workers
+        self.calls_per_project = settings.recommender_calls_per_project
+        self.process_workers = settings.process_workers
         self.batch_size = settings.firestore_batch_size
+        self.write_concurrency = settings.firestore_write_concurrency
+        self.skip_unchanged = settings.skip_unchanged_recommendations
+        self.store_content = settings.store_recommendation_content
+        # Stored version of each recommendation this process's writer may
+        # write, by document ID; see _load_stored_versions
+        self.stored_versions: Dict[str, tuple] = {}
         
         logger.info(f"Initialized CostRecommendationCollector for project: {self.project_id}")
         logger.info(f"Target Firestore collection: {self.collection_name}")
@@ -68,7 +332,15 @@ class CostRecommendationCollector:
         if self.use_inventory:
             logger.info(f"Inventory source: {self.inventory_db_name}/{self.inventory_collection_name}")
         logger.info(f"Recommender types: {len(self.recommender_types)} types configured")
-        logger.info(f"Performance: {self.max_workers} workers, batch size {self.batch_size}")
+        self.resolved_recommender_types = self._resolve_recommender_types()
+        logger.info(f"Filter recommender types by enabled services: {self.filter_by_enabled_services}")
+        # Every hot path waits on an API call, so concurrency is sized by
+        # the calls to keep in flight rather than by CPU count
+        logger.info(
+            f"Performance (network-bound): {self.max_workers} workers, {settings.recommender_max_concurrency} "
+            f"concurrent recommender calls ({self.calls_per_project} per project), batch size {self.batch_size}, "
+            f"{self.write_concurrency} concurrent batch commits"
+        )
     
     def get_projects_from_inventory(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -82,11 +354,16 @@ class CostRecommendationCollector:
         
         try:
             # Connect to inventory database (may be different from recommendations DB)
-            inventory_db = firestore.Client(project=settings.gcp_project_id, database=self.inventory_db_name)
+            inventory_db = get_firestore_client(self.inventory_db_name)
             collection_ref = inventory_db.collection(self.inventory_collection_name)
             
-            # Read all documents from the inventory collection
-            docs = collection_ref.stream()
+            # Read all documents from the inventory collection, fetching only
+            # the project ID and metadata fields rather than whole documents
+            docs = collection_ref.select([
+                self.inventory_project_id_field,
+                self.inventory_app_code_field,
+                self.inventory_bu_code_field
+            ]).stream()
             
             for doc in docs:
                 doc_data = doc.to_dict()
@@ -149,11 +426,11 @@ class CostRecommendationCollector:
                 
                 for project in page_result:
                     if project.state == resourcemanager_v3.Project.State.ACTIVE:
-                        project_id = project.name.split('/')[-1]
+                        project_id = self._add_listed_project(project)
                         projects.append(project_id)
                         logger.info(f"Found project in folder: {project_id} ({project.display_name})")
                     else:
-                        logger.debug(f"Skipping project {project.name.split('/')[-1]} with state: {project.state.name}")
+                        logger.debug(f"Skipping project {project.project_id} with state: {project.state.name}")
                 
             elif scope_type == 'organization':
                 # Organization mode - get all projects under the organization
@@ -181,11 +458,11 @@ class CostRecommendationCollector:
                     total_found += 1
                     logger.debug(f"Found project: {project.name} (state: {project.state.name}, parent: {project.parent})")
                     if project.state == resourcemanager_v3.Project.State.ACTIVE:
-                        project_id = project.name.split('/')[-1]
+                        project_id = self._add_listed_project(project)
                         projects.append(project_id)
                         logger.info(f"Found project: {project_id} ({project.display_name}) - Parent: {project.parent}")
                     else:
-                        logger.debug(f"Skipping project {project.name.split('/')[-1]} with state: {project.state.name}")
+                        logger.debug(f"Skipping project {project.project_id} with state: {project.state.name}")
                 
                 logger.info(f"Total projects found in organization: {total_found}, Active projects: {len(projects)}")
             
@@ -203,6 +480,120 @@ class CostRecommendationCollector:
             logger.info(f"Falling back to configured project: {self.project_id}")
             return [self.project_id]
     
+    def _add_listed_project(self, project: resourcemanager_v3.Project) -> str:
+        """
+        Record the number of a project returned by list or search. The
+        resource name is projects/{project_number}, so no lookup is needed later.
+        
+        Returns:
+            The project ID
+        """
+        self._project_numbers[project.project_id] = project.name.rpartition('/')[2]
+        return project.project_id
+    
+    def _load_project_numbers(self) -> Dict[str, str]:
+        """Read the project numbers saved by a previous run, if a cache file is configured."""
+        if not self.project_number_cache_file or not os.path.exists(self.project_number_cache_file):
+            return {}
+        
+        try:
+            with open(self.project_number_cache_file, 'r') as f:
+                project_numbers = json.load(f)
+            logger.info(f"Loaded {len(project_numbers)} cached project numbers")
+            return project_numbers
+        except Exception as e:
+            logger.warning(f"Could not read project number cache {self.project_number_cache_file}: {e}")
+            return {}
+    
+    def save_project_numbers(self):
+        """Write the resolved project numbers to the cache file, if one is configured."""
+        if not self.project_number_cache_file:
+            return
+        
+        tmp_file = f"{self.project_number_cache_file}.tmp"
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(self._project_numbers, f)
+            os.replace(tmp_file, self.project_number_cache_file)
+            logger.info(f"Saved {len(self._project_numbers)} project numbers to {self.project_number_cache_file}")
+        except OSError as e:
+            logger.warning(f"Could not write project number cache {self.project_number_cache_file}: {e}")
+    
+    async def _get_project_number(self, project_id: str) -> str:
+        """
+        Look up the project number of a project. Resolved numbers are cached.
+        
+        Args:
+            project_id: The GCP project ID
+            
+        Returns:
+            The project number, or the project ID if it cannot be resolved
+        """
+        if project_id in self._project_numbers:
+            return self._project_numbers[project_id]
+        
+        try:
+            project_resource = await self.projects_async_client.get_project(
+                name=f"projects/{project_id}"
+            )
+            project_number = project_resource.name.rpartition('/')[2]
+            self._project_numbers[project_id] = project_number
+            return project_number
+        except Exception as e:
+            logger.warning(f"Could not get project number for {project_id}: {e}")
+            return project_id
+    
+    async def _search_project_numbers(self, project_ids: List[str]):
+        """
+        Look up the numbers of several projects with one search_projects query
+        and cache them. Projects the search does not return are left unresolved.
+        
+        Args:
+            project_ids: The GCP project IDs, at most PROJECT_SEARCH_CHUNK_SIZE
+        """
+        query = " OR ".join(f"id:{project_id}" for project_id in project_ids)
+        try:
+            async for project in await self.projects_async_client.search_projects(query=query):
+                self._add_listed_project(project)
+        except Exception as e:
+            logger.warning(f"Could not search project numbers of {len(project_ids)} projects: {e}")
+    
+    async def get_project_numbers(self, project_ids: List[str]) -> Dict[str, str]:
+        """
+        Resolve the project numbers of many projects concurrently.
+        
+        Projects are searched PROJECT_SEARCH_CHUNK_SIZE at a time; any the
+        searches miss are looked up one by one. Calls go through the async
+        Resource Manager client, at most max_workers at a time.
+        
+        Args:
+            project_ids: The GCP project IDs
+            
+        Returns:
+            Dictionary mapping project ID to project number
+        """
+        unresolved = [project_id for project_id in project_ids if project_id not in self._project_numbers]
+        logger.info(f"Resolving project numbers for {len(unresolved)} of {len(project_ids)} projects")
+        lookup_semaphore = asyncio.Semaphore(self.max_workers)
+        
+        async def bounded(lookup):
+            async with lookup_semaphore:
+                await lookup
+        
+        await asyncio.gather(*(
+            bounded(self._search_project_numbers(unresolved[i:i + PROJECT_SEARCH_CHUNK_SIZE]))
+            for i in range(0, len(unresolved), PROJECT_SEARCH_CHUNK_SIZE)
+        ))
+        
+        unresolved = [project_id for project_id in unresolved if project_id not in self._project_numbers]
+        if unresolved:
+            logger.info(f"Looking up {len(unresolved)} project numbers not returned by search")
+        await asyncio.gather(
+            *(bounded(self._get_project_number(project_id)) for project_id in unresolved)
+        )
+        # Projects whose lookup failed fall back to the project ID
+        return {project_id: self._project_numbers.get(project_id, project_id) for project_id in project_ids}
+    
     def ensure_firestore_collection(self):
         """Ensure Firestore collection exists (Firestore creates collections automatically)."""
         # Firestore creates collections automatically when first document is added
@@ -218,6 +609,9 @@ class CostRecommendationCollector:
         """
         Discover all available recommender types for a project.
         
+        The types do not depend on the project, so they are resolved once
+        in __init__ and returned from there.
+        
         Args:
             project_number: The GCP project number
             location: Location to check (default: global)
@@ -225,115 +619,115 @@ class CostRecommendationCollector:
         Returns:
             List of available recommender types
         """
-        recommender_types = []
-        
+        return self.resolved_recommender_types
+    
+    def _resolve_recommender_types(self) -> List[str]:
+        """Return the configured recommender types, or all known types if none are configured."""
         # If specific types are configured, use those
         if self.recommender_types and len(self.recommender_types) > 0 and self.recommender_types[0]:
             logger.info(f"Using configured recommender types: {self.recommender_types}")
-            return self.recommender_types
+            # Drop repeated types, keeping the configured order
+            return list(dict.fromkeys(self.recommender_types))
         
-        # Otherwise, try to discover all available recommender types
-        # Note: The Recommender API doesn't have a direct "list recommenders" method,
-        # so we'll use a comprehensive list of known recommender types
         logger.info("No specific recommender types configured, using comprehensive list of all known types")
+        logger.info(f"Discovered {len(KNOWN_RECOMMENDER_TYPES)} recommender types")
+        return list(KNOWN_RECOMMENDER_TYPES)
+    
+    async def _get_enabled_services(self, project_number: str) -> Optional[set]:
+        """
+        List the services enabled in a project. Results are cached per project.
         
-        known_recommender_types = [
-            # Compute Engine
-            'google.compute.instance.MachineTypeRecommender',
-            'google.compute.disk.IdleResourceRecommender',
-            'google.compute.instance.IdleResourceRecommender',
-            'google.compute.address.IdleResourceRecommender',
-            'google.compute.image.IdleResourceRecommender',
-            'google.compute.instanceGroupManager.MachineTypeRecommender',
-            
-            # Cloud SQL
-            'google.cloudsql.instance.IdleRecommender',
-            'google.cloudsql.instance.OverprovisionedRecommender',
-            'google.cloudsql.instance.OutOfDiskRecommender',
-            
-            # Logging
-            'google.logging.productSuggestion.ContainerRecommender',
-            
-            # BigQuery
-            'google.bigquery.capacityCommitments.Recommender',
-            'google.bigquery.table.PartitionClusterRecommender',
-            
-            # Cloud Storage
-            'google.storage.bucket.LifecycleRecommender',
-            
-            # GKE
-            'google.container.DiagnosisRecommender',
-            
-            # Monitoring
-            'google.monitoring.productSuggestion.ComputeRecommender',
-            
-            # App Engine
-            'google.appengine.applicationIdleRecommender',
-            
-            # Cloud Run
-            'google.run.service.CostRecommender',
-            'google.run.service.IdentityRecommender',
-            
-            # Cloud Functions
-            'google.cloudfunctions.PerformanceRecommender',
-            
-            # Firestore
-            'google.firestore.index.Recommender',
-            
-            # Spanner
-            'google.spanner.instance.IdleRecommender',
-            
-            # Resource Manager
-            'google.resourcemanager.project.IdleRecommender',
-            
-            # Committed Use Discounts
-            'google.compute.commitment.UsageCommitmentRecommender',
-            
-            # GKE Workload Rightsizing
-            'google.container.workload.RightSizingRecommender',
+        Args:
+            project_number: The GCP project number
             
-            # Cloud Storage
-            'google.storage.bucket.SoftDeleteRecommender',
+        Returns:
+            Set of enabled service names (e.g. compute.googleapis.com), or None
+            if they could not be listed
+        """
+        if project_number in self._enabled_services:
+            return self._enabled_services[project_number]
+        
+        try:
+            request = service_usage_v1.ListServicesRequest(
+                parent=f"projects/{project_number}",
+                filter="state:ENABLED",
+                page_size=200
+            )
+            # Only service names are needed; the field mask keeps the full
+            # service configurations out of every response page
+            services = await self.service_usage_client.list_services(
+                request=request,
+                metadata=[('x-goog-fieldmask', ENABLED_SERVICES_FIELD_MASK)]
+            )
+            enabled = {service.name.rpartition('/')[2] async for service in services}
+        except Exception as e:
+            logger.debug(f"Could not list enabled services for {project_number}: {type(e).__name__}")
+            enabled = None
+        
+        self._enabled_services[project_number] = enabled
+        return enabled
+    
+    async def filter_recommender_types(self, project_number: str, recommender_types: List[str]) -> List[str]:
+        """
+        Drop recommender types none of whose services is enabled in the project.
+        
+        All types are kept when filtering is turned off or the enabled
+        services cannot be listed.
+        
+        Args:
+            project_number: The GCP project number
+            recommender_types: Candidate recommender types
             
-            # Reservations
-            'google.compute.IdleResourceRecommender',
-        ]
+        Returns:
+            Recommender types worth querying for the project
+        """
+        if not self.filter_by_enabled_services:
+            return recommender_types
         
-        logger.info(f"Discovered {len(known_recommender_types)} recommender types")
-        return known_recommender_types
+        enabled = await self._get_enabled_services(project_number)
+        if enabled is None:
+            return recommender_types
+        
+        filtered = []
+        for recommender_type in recommender_types:
+            services = required_services(recommender_type)
+            if services is None or not services.isdisjoint(enabled):
+                filtered.append(recommender_type)
+        return filtered
     
-    def get_recommendations_for_project(
+    async def get_recommendations_for_project(
         self, 
         project_id: str,
         project_number: str = None,
-        metadata: Dict[str, Any] = None
-    ) -> List[Dict[str, Any]]:
+        metadata: Dict[str, Any] = None,
+        collected_at: str = None
+    ) -> int:
         """
         Fetch recommendations for a specific project across all recommender types.
         
+        Records are put on the write queue as each recommender call returns
+        rather than collected for the whole project.
+        
         Args:
             project_id: The GCP project ID
             project_number: The GCP project number (optional)
             metadata: Optional metadata (app_code, bu_code) to enrich recommendations
+            collected_at: ISO timestamp stamped on every record (defaults to now)
             
         Returns:
-            List of recommendation records
+            Number of recommendation records queued for writing
         """
-        all_recommendations = []
+        collected_at = collected_at or datetime.utcnow().isoformat()
         
-        # Try to get project number if not provided
+        # Look up the project number if not provided
         if not project_number:
-            try:
-                project_resource = self.projects_client.get_project(
-                    name=f"projects/{project_id}"
-                )
-                project_number = project_resource.name.split('/')[-1]
-            except Exception as e:
-                logger.warning(f"Could not get project number for {project_id}: {e}")
-                project_number = project_id
+            project_number = await self._get_project_number(project_id)
         
-        # Discover all available recommender types
-        recommender_types = self.discover_recommender_types(project_number)
+        # Discover all available recommender types, then keep those whose service is enabled
+        recommender_types = await self.filter_recommender_types(
+            project_number,
+            self.discover_recommender_types(project_number)
+        )
         logger.info(f"Checking {len(recommender_types)} recommender types for project {project_id}")
         logger.info(f"Using state filter: {self.state_filter if self.state_filter else 'None (all states)'}")
         
@@ -348,54 +742,189 @@ class CostRecommendationCollector:
         logger.info(f"Checking locations: {locations}")
         logger.debug(f"Type of locations: {type(locations)}")
         
-        # Iterate through all recommender types
-        for recommender_type in recommender_types:
-            for location in locations:
-                try:
-                    parent = f"projects/{project_number}/locations/{location}/recommenders/{recommender_type}"
-                    logger.debug(f"Checking parent: {parent}")
-                    
-                    request = recommender_v1.ListRecommendationsRequest(
-                        parent=parent,
-                        filter=f"stateInfo.state={self.state_filter}" if self.state_filter else None
-                    )
-                    
-                    recommendations = self.recommender_client.list_recommendations(request=request)
-                    
-                    rec_count = 0
-                    for recommendation in recommendations:
-                        record = self._parse_recommendation(
-                            recommendation, 
-                            project_id, 
-                            project_number,
-                            location,
-                            recommender_type,
-                            metadata
-                        )
-                        all_recommendations.append(record)
-                        rec_count += 1
-                    
-                    if rec_count > 0:
-                        logger.debug(f"Found {rec_count} recommendation(s) for {recommender_type} in {location}")
-                        
-                except exceptions.NotFound:
-                    # This location doesn't have this recommender type - this is normal
-                    continue
-                except exceptions.PermissionDenied:
-                    # Permission denied is expected for services not enabled or insufficient permissions
-                    # Only log at debug level without the full error details to reduce noise
-                    logger.debug(f"Permission denied for {recommender_type} in {location} (service may not be enabled or requires additional permissions)")
-                    continue
-                except exceptions.InvalidArgument:
-                    # Invalid argument usually means the recommender doesn't support this location
-                    # This is expected and normal - skip silently
-                    continue
-                except Exception as e:
-                    logger.debug(f"Error fetching {recommender_type} for {location}: {type(e).__name__}")
-                    continue
+        # Fetch every (recommender type, location) combination concurrently.
+        # The parent of each location is formatted once, not once per type.
+        location_parents = {
+            location: f"projects/{project_number}/locations/{location}/recommenders/"
+            for location in locations
+        }
+        skipped = Counter()
+        # The project's own limit keeps one project with many types from
+        # taking every shared recommender call slot
+        call_semaphore = asyncio.Semaphore(self.calls_per_project)
+        
+        async def bounded(fetch):
+            async with call_semaphore:
+                return await fetch
+        
+        results = await asyncio.gather(*(
+            bounded(self._fetch_recommendations(
+                project_id,
+                project_number,
+                recommender_type,
+                location,
+                metadata,
+                collected_at,
+                location_parents[location] + recommender_type,
+                skipped
+            ))
+            for recommender_type in recommender_types
+            for location in supported_locations(recommender_type, locations)
+        ))
+        total = sum(results)
         
-        logger.info(f"Collected {len(all_recommendations)} recommendations for project {project_id}")
-        return all_recommendations
+        if skipped:
+            logger.info(
+                f"Project {project_id}: skipped "
+                + ", ".join(f"{count} {reason}" for reason, count in skipped.items())
+            )
+        logger.info(f"Collected {total} recommendations for project {project_id}")
+        return total
+    
+    async def _fetch_recommendations(
+        self,
+        project_id: str,
+        project_number: str,
+        recommender_type: str,
+        location: str,
+        metadata: Dict[str, Any] = None,
+        collected_at: str = None,
+        parent: str = None,
+        skipped: Optional[Counter] = None
+    ) -> int:
+        """
+        Fetch recommendations of one recommender type in one location of a
+        project and put the parsed records on the write queue.
+        
+        Recommenders that do not exist or are not accessible in the location
+        are skipped and return no records. At most recommender_max_concurrency
+        calls run at once across all projects. Combinations rejected as not
+        found or invalid for two different projects are not requested again
+        (see _mark_unsupported).
+        
+        Args:
+            project_id: The GCP project ID
+            project_number: The GCP project number
+            recommender_type: The recommender type
+            location: The location
+            metadata: Optional metadata (app_code, bu_code) to enrich recommendations
+            collected_at: ISO timestamp stamped on every record
+            parent: Resource name of the recommender in the location
+                (built from the other arguments if not given)
+            skipped: Counter of skipped calls by error type, updated in place
+                so the caller can log one summary per project
+            
+        Returns:
+            Number of recommendation records queued for writing
+        """
+        if (recommender_type, location) in self._unsupported:
+            return 0
+        
+        try:
+            parent = parent or f"projects/{project_number}/locations/{location}/recommenders/{recommender_type}"
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Checking parent: {parent}")
+            
+            request = recommender_v1.ListRecommendationsRequest(
+                parent=parent,
+                filter=self.state_filter_expr,
+                page_size=RECOMMENDATIONS_PAGE_SIZE
+            )
+            
+            count = await self._stream_recommendations(request, {
+                'project_id': project_id,
+                'project_number': project_number,
+                'location': location,
+                'recommender_type': recommender_type,
+                'metadata': metadata,
+                'collected_at': collected_at,
+            })
+            
+            if count:
+                logger.debug(f"Found {count} recommendation(s) for {recommender_type} in {location}")
+            return count
+                
+        except exceptions.NotFound:
+            # This location doesn't have this recommender type - this is normal
+            self._mark_unsupported(recommender_type, location, project_id, project_number)
+            reason = 'NotFound'
+        except exceptions.PermissionDenied:
+            # Permission denied is expected for services not enabled or insufficient permissions.
+            # Only counted, for the per-project summary, to reduce noise.
+            # Not cached: it depends on the project.
+            reason = 'PermissionDenied'
+        except exceptions.InvalidArgument:
+            # Invalid argument usually means the recommender doesn't support this location
+            # This is expected and normal - skip silently
+            self._mark_unsupported(recommender_type, location, project_id, project_number)
+            reason = 'InvalidArgument'
+        except Exception as e:
+            reason = type(e).__name__
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Error fetching {recommender_type} for {location}: {reason}")
+        
+        if skipped is not None:
+            skipped[reason] += 1
+        return 0
+    
+    def _mark_unsupported(self, recommender_type: str, location: str, project_id: str, project_number: str):
+        """
+        Record that a (recommender type, location) pair was rejected for a project.
+        
+        The pair is skipped for the rest of the run only once two different
+        projects have had it rejected. Rejections for projects whose number
+        could not be resolved are ignored, since the bad parent is the likely cause.
+        
+        Args:
+            recommender_type: The recommender type
+            location: The location
+            project_id: The GCP project ID
+            project_number: The project number used in the request
+        """
+        if not project_number or not project_number.isdigit():
+            return
+        
+        pair = (recommender_type, location)
+        first_project = self._unsupported_candidates.setdefault(pair, project_id)
+        if first_project != project_id and pair not in self._unsupported:
+            self._unsupported.add(pair)
+            logger.info(
+                f"Skipping {recommender_type} in {location} for the rest of the run: "
+                f"rejected for projects {first_project} and {project_id}"
+            )
+    
+    async def _stream_recommendations(
+        self,
+        request: recommender_v1.ListRecommendationsRequest,
+        parse_args: Dict[str, Any]
+    ) -> int:
+        """
+        List recommendations and put the parsed records on the write queue
+        in chunks of at most batch_size, page by page as they arrive.
+        
+        Args:
+            request: The list_recommendations request
+            parse_args: Keyword arguments for _parse_recommendation
+            
+        Returns:
+            Number of recommendation records queued for writing
+        """
+        count = 0
+        chunk = []
+        
+        async with self.fetch_semaphore:
+            recommendations = await self.recommender_client.list_recommendations(request=request)
+            async for recommendation in recommendations:
+                chunk.append(self._parse_recommendation(recommendation, **parse_args))
+                if len(chunk) >= self.batch_size:
+                    await self._enqueue_records(chunk)
+                    count += len(chunk)
+                    chunk = []
+        
+        if chunk:
+            await self._enqueue_records(chunk)
+            count += len(chunk)
+        return count
     
     def _parse_recommendation(
         self,
@@ -404,7 +933,8 @@ class CostRecommendationCollector:
         project_number: str,
         location: str,
         recommender_type: str,
-        metadata: Dict[str, Any] = None
+        metadata: Dict[str, Any] = None,
+        collected_at: str = None
     ) -> Dict[str, Any]:
         """
         Parse a recommendation object into a dictionary for BigQuery.
@@ -416,99 +946,122 @@ class CostRecommendationCollector:
             location: The location
             recommender_type: The recommender type
             metadata: Optional metadata (app_code, bu_code)
+            collected_at: ISO timestamp of the collection run (defaults to now)
             
         Returns:
-            Dictionary with recommendation data
+            Dictionary with recommendation data; timestamps are ISO strings so
+            the record can be written to Firestore as is
         """
+        collected_at = collected_at or datetime.utcnow().isoformat()
+        
+        # Fields are read from the raw protobuf message: presence is checked
+        # with HasField instead of proto-plus truthiness, which compares
+        # sub-messages against an empty message, and plain fields skip the
+        # proto-plus wrappers
+        pb = recommendation._pb
+        
         # Extract primary impact (usually cost savings)
         primary_impact = None
         primary_impact_cost = None
         primary_impact_currency = None
         primary_impact_duration = None
         
-        if recommendation.primary_impact:
-            primary_impact = recommendation.primary_impact.category.name
-            if recommendation.primary_impact.cost_projection:
-                cost_proj = recommendation.primary_impact.cost_projection
-                primary_impact_cost = cost_proj.cost.units + (cost_proj.cost.nanos / 1e9)
-                primary_impact_currency = cost_proj.cost.currency_code
-                if cost_proj.duration:
+        if pb.HasField('primary_impact'):
+            impact = pb.primary_impact
+            primary_impact = recommender_v1.Impact.Category(impact.category).name
+            if impact.HasField('cost_projection'):
+                cost_proj = impact.cost_projection
+                cost = cost_proj.cost
+                primary_impact_cost = cost.units + (cost.nanos / 1e9)
+                primary_impact_currency = cost.currency_code
+                if cost_proj.HasField('duration'):
                     primary_impact_duration = f"{cost_proj.duration.seconds}s"
         
+        # Convert the content once; target resources and operation groups are
+        # read from the resulting dict instead of walking the proto again
+        content = MessageToDict(pb.content, preserving_proto_field_name=True) if pb.HasField('content') else {}
+        
         # Extract target resources
         target_resources = []
-        if recommendation.content and recommendation.content.overview:
-            for key, value in recommendation.content.overview.items():
-                if 'resource' in key.lower():
-                    target_resources.append(str(value))
+        for key, value in content.get('overview', {}).items():
+            if 'resource' in key.lower():
+                target_resources.append(str(value))
         
         # Extract operation groups
         operation_groups = []
-        if recommendation.content and recommendation.content.operation_groups:
-            for op_group in recommendation.content.operation_groups:
-                operations = []
-                for operation in op_group.operations:
-                    operations.append({
-                        'action': operation.action,
-                        'resource_type': operation.resource_type,
-                        'resource': operation.resource,
-                        'path': operation.path,
-                        'value': str(operation.value) if operation.value else None
-                    })
-                operation_groups.append({'operations': operations})
+        for op_group in content.get('operation_groups', []):
+            operations = []
+            for operation in op_group.get('operations', []):
+                value = operation.get('value')
+                operations.append({
+                    'action': operation.get('action', ''),
+                    'resource_type': operation.get('resource_type', ''),
+                    'resource': operation.get('resource', ''),
+                    'path': operation.get('path', ''),
+                    'value': str(value) if value else None
+                })
+            operation_groups.append({'operations': operations})
         
         # Extract associated insights
-        associated_insights = []
-        if recommendation.associated_insights:
-            for insight in recommendation.associated_insights:
-                associated_insights.append(insight.insight)
+        associated_insights = [insight.insight for insight in pb.associated_insights]
         
         # Get recommendation ID from name
-        recommendation_id = recommendation.name.split('/')[-1]
+        name = pb.name
+        recommendation_id = name.rpartition('/')[2]
         
         record = {
             'recommendation_id': recommendation_id,
-            'recommendation_name': recommendation.name,
+            'recommendation_name': name,
             'project_id': project_id,
             'project_number': project_number,
             'location': location,
             'recommender_type': recommender_type,
-            'recommender_subtype': recommendation.recommender_subtype,
-            'description': recommendation.description,
-            'state': recommendation.state_info.state.name if recommendation.state_info else None,
-            'priority': recommendation.priority.name if recommendation.priority else None,
-            'last_refresh_time': recommendation.last_refresh_time.isoformat() if recommendation.last_refresh_time else None,
+            'recommender_subtype': pb.recommender_subtype,
+            'description': pb.description,
+            'state': recommender_v1.RecommendationStateInfo.State(pb.state_info.state).name if pb.HasField('state_info') else None,
+            'priority': recommender_v1.Recommendation.Priority(pb.priority).name if pb.priority else None,
+            'last_refresh_time': pb.last_refresh_time.ToDatetime(tzinfo=timezone.utc).isoformat() if pb.HasField('last_refresh_time') else None,
             'primary_impact_category': primary_impact,
             'primary_impact_cost_projection': primary_impact_cost,
             'primary_impact_currency': primary_impact_currency,
             'primary_impact_duration': primary_impact_duration,
-            'target_resources': json.dumps(target_resources) if target_resources else None,
-            'operation_groups': json.dumps(operation_groups) if operation_groups else None,
-            'associated_insights': json.dumps(associated_insights) if associated_insights else None,
-            'etag': recommendation.etag,
-            'xor_group_id': recommendation.xor_group_id,
-            'content': str(recommendation.content) if recommendation.content else None,
-            'collected_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat(),
-            'last_updated': date.today().isoformat(),
+            'target_resources': encode_json(target_resources) if target_resources else None,
+            'operation_groups': encode_json(operation_groups) if operation_groups else None,
+            'associated_insights': encode_json(associated_insights) if associated_insights else None,
+            'etag': pb.etag,
+            'xor_group_id': pb.xor_group_id,
+            'collected_at': collected_at,
+            'updated_at': collected_at,
+            'last_updated': self.run_date,
             'app_code': metadata.get('app_code') if metadata else None,
             'bu_code': metadata.get('bu_code') if metadata else None,
         }
+        
+        # The content repeats the extracted fields above and is often the
+        # largest part of the document, so it is only stored on request
+        if self.store_content and content:
+            record['content'] = encode_json(content)
             
         return record
 
-    def get_recommendations_for_billing_account(self, billing_account_id: str) -> List[Dict[str, Any]]:
+    async def get_recommendations_for_billing_account(
+        self,
+        billing_account_id: str,
+        collected_at: str = None
+    ) -> int:
         """
-        Fetch recommendations for a billing account (specifically spend-based CUDs).
+        Fetch recommendations for a billing account (specifically spend-based CUDs)
+        and put them on the write queue.
         
         Args:
             billing_account_id: The billing account ID
+            collected_at: ISO timestamp stamped on every record (defaults to now)
             
         Returns:
-            List of recommendation records
+            Number of recommendation records queued for writing
         """
         logger.info(f"Fetching recommendations for billing account: {billing_account_id}")
-        all_recommendations = []
+        collected_at = collected_at or datetime.utcnow().isoformat()
         
         # Spend-based CUD recommender
         recommender_type = 'google.cloudbilling.commitment.SpendBasedCommitmentRecommender'
@@ -518,117 +1071,306 @@ class CostRecommendationCollector:
         if not locations:
             locations = ['global']
             
-        for location in locations:
-            try:
-                # Billing account parent format: billingAccounts/{billing_account_id}/locations/{location}/recommenders/{recommender_id}
-                parent = f"billingAccounts/{billing_account_id}/locations/{location}/recommenders/{recommender_type}"
-                
-                request = recommender_v1.ListRecommendationsRequest(
-                    parent=parent,
-                    filter=f"stateInfo.state={self.state_filter}" if self.state_filter else None
-                )
-                
-                recommendations = self.recommender_client.list_recommendations(request=request)
-                
-                rec_count = 0
-                for recommendation in recommendations:
-                    # Parse similar to project recommendations but with billing account context
-                    record = self._parse_recommendation(
-                        recommendation, 
-                        project_id=f"billing-{billing_account_id}", # Use billing ID as pseudo-project ID
-                        project_number=billing_account_id,
-                        location=location,
-                        recommender_type=recommender_type
-                    )
-                    all_recommendations.append(record)
-                    rec_count += 1
+        # Billing account parent format: billingAccounts/{billing_account_id}/locations/{location}/recommenders/{recommender_id}
+        parent_prefix = f"billingAccounts/{billing_account_id}/locations/"
+        
+        # Fetch every location concurrently
+        counts = await asyncio.gather(*(
+            self._fetch_billing_recommendations(
+                billing_account_id,
+                recommender_type,
+                location,
+                parent_prefix,
+                collected_at
+            )
+            for location in supported_locations(recommender_type, locations)
+        ))
+        total = sum(counts)
                 
-                if rec_count > 0:
-                    logger.debug(f"Found {rec_count} billing recommendation(s) in {location}")
-                    
-            except exceptions.NotFound:
-                continue
-            except exceptions.PermissionDenied:
-                logger.debug(f"Permission denied for billing account {billing_account_id} in {location}")
-                continue
-            except Exception as e:
-                logger.debug(f"Error fetching billing recommendations for {location}: {type(e).__name__}")
-                continue
+        logger.info(f"Collected {total} billing recommendations")
+        return total
+    
+    async def _fetch_billing_recommendations(
+        self,
+        billing_account_id: str,
+        recommender_type: str,
+        location: str,
+        parent_prefix: str,
+        collected_at: str
+    ) -> int:
+        """
+        Fetch recommendations of a billing account in one location and put
+        them on the write queue.
+        
+        Args:
+            billing_account_id: The billing account ID
+            recommender_type: The recommender type
+            location: The location
+            parent_prefix: "billingAccounts/{billing_account_id}/locations/"
+            collected_at: ISO timestamp stamped on every record
+            
+        Returns:
+            Number of recommendation records queued for writing
+        """
+        try:
+            parent = parent_prefix + location + "/recommenders/" + recommender_type
+            
+            request = recommender_v1.ListRecommendationsRequest(
+                parent=parent,
+                filter=self.state_filter_expr,
+                page_size=RECOMMENDATIONS_PAGE_SIZE
+            )
+            
+            # Parse similar to project recommendations but with billing account context
+            count = await self._stream_recommendations(request, {
+                'project_id': f"billing-{billing_account_id}", # Use billing ID as pseudo-project ID
+                'project_number': billing_account_id,
+                'location': location,
+                'recommender_type': recommender_type,
+                'collected_at': collected_at,
+            })
+            
+            if count:
+                logger.debug(f"Found {count} billing recommendation(s) in {location}")
+            return count
                 
-        logger.info(f"Collected {len(all_recommendations)} billing recommendations")
-        return all_recommendations
+        except exceptions.NotFound:
+            pass
+        except exceptions.PermissionDenied:
+            logger.debug(f"Permission denied for billing account {billing_account_id} in {location}")
+        except Exception as e:
+            logger.debug(f"Error fetching billing recommendations for {location}: {type(e).__name__}")
+        
+        return 0
     
-    def save_recommendations_to_firestore(self, records: List[Dict[str, Any]], show_progress: bool = False):
+    async def _enqueue_records(self, records: List[Dict[str, Any]]):
+        """Put a list of parsed records on the write queue, waiting while it is full."""
+        await self.write_queue.put(records)
+    
+    async def _queued_records(self) -> AsyncIterator[Optional[Dict[str, Any]]]:
         """
-        Save recommendation records to Firestore in batches.
+        Yield records from the write queue until the None sentinel is received.
+        
+        None is also yielded whenever the queue has been drained, telling the
+        writer to commit what it holds instead of waiting for a full batch.
+        """
+        while True:
+            if self.write_queue.empty():
+                yield None
+            records = await self.write_queue.get()
+            if records is None:
+                return
+            for record in records:
+                yield record
+    
+    async def _write_queued_records(self) -> int:
+        """
+        Write records from the write queue to Firestore until the None
+        sentinel is received. Runs as a task alongside the fetches.
+        
+        Returns:
+            Number of recommendations saved
+        """
+        records = self._queued_records()
+        try:
+            return await self.save_recommendations_to_firestore(records, show_progress=True)
+        finally:
+            # If the writer failed, keep consuming so fetches never block on a full queue
+            async for _ in records:
+                pass
+    
+    async def _commit_writes(self, writes: List[Write]) -> int:
+        """
+        Send writes in one Commit request, retrying transient errors with backoff.
+        
+        Returns:
+            Number of writes that failed (0 or all of them)
+        """
+        try:
+            await self.firestore_api.commit(
+                request={'database': self.database_path, 'writes': writes},
+                retry=FIRESTORE_WRITE_RETRY
+            )
+            return 0
+        except Exception as e:
+            logger.error(f"Failed to commit batch of {len(writes)} recommendations: {e}")
+            return len(writes)
+    
+    async def _start_commit(self, in_flight: set, writes: List[Write]) -> int:
+        """
+        Start committing writes in the background. When write_concurrency
+        commits are already in flight, first wait for one of them to finish.
         
         Args:
-            records: List of recommendation records to save
-            show_progress: Whether to log progress for each batch
+            in_flight: Tasks of the commits in flight; updated in place
+            writes: Writes of the new commit
+            
+        Returns:
+            Number of failed writes of the commits that finished while waiting
         """
-        if not records:
-            logger.debug("No records to save")
-            return
+        failed = 0
+        if len(in_flight) >= self.write_concurrency:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            in_flight -= done
+            failed = sum(task.result() for task in done)
+        in_flight.add(asyncio.create_task(self._commit_writes(writes)))
+        return failed
+    
+    async def _load_stored_versions(self) -> Dict[Optional[str], Dict[str, tuple]]:
+        """
+        Read the fields that identify the stored version of every recommendation.
+        
+        Only the project ID and the compared fields are read (a projection
+        query), so the preload is much cheaper than reading whole documents.
+        It runs once per run, in the parent process; each writer is then
+        given only the versions of the projects it writes.
+        
+        Returns:
+            Dictionary mapping project ID (billing-<id> for billing accounts)
+            to a dictionary mapping document ID to a tuple of UNCHANGED_FIELDS
+            values; empty unless skip_unchanged is enabled
+        """
+        if not self.skip_unchanged:
+            return {}
+        
+        query = self.db.collection(self.collection_name).select(['project_id', *UNCHANGED_FIELDS])
+        versions = {}
+        count = 0
+        async for doc in query.stream():
+            data = doc.to_dict()
+            versions.setdefault(data.get('project_id'), {})[doc.id] = tuple(
+                data.get(field) for field in UNCHANGED_FIELDS
+            )
+            count += 1
+        logger.info(f"Loaded stored versions of {count} recommendations")
+        return versions
+    
+    @staticmethod
+    def _stored_versions_of(
+        stored_by_project: Dict[Optional[str], Dict[str, tuple]],
+        project_ids
+    ) -> Dict[str, tuple]:
+        """
+        Merge the stored versions of the given projects.
         
+        Args:
+            stored_by_project: Stored versions by project ID, from _load_stored_versions
+            project_ids: Project IDs whose versions to include
+            
+        Returns:
+            Dictionary mapping document ID to a tuple of UNCHANGED_FIELDS values
+        """
+        versions = {}
+        for project_id in project_ids:
+            versions.update(stored_by_project.get(project_id, {}))
+        return versions
+    
+    async def save_recommendations_to_firestore(
+        self,
+        records: AsyncIterator[Optional[Dict[str, Any]]],
+        show_progress: bool = False
+    ) -> int:
+        """
+        Save recommendation records to Firestore in batches.
+        
+        Each batch is sent as a single Commit request of prebuilt Write
+        protos, each replacing the whole document. Up to write_concurrency
+        batch commits are in flight at once, so commits overlap with each
+        other and with the recommender fetches producing the records.
+        Commits failing with a transient error are retried with backoff.
+        
+        With skip_unchanged enabled, a recommendation whose stored etag and
+        metadata (preloaded into stored_versions) match is not rewritten, unless its last_updated date is
+        older than half the stale cleanup window; the rewrite keeps it from
+        being deleted as stale.
+        
+        Args:
+            records: Async iterator of recommendation records to save; None
+                commits the writes held so far without waiting for a full batch
+            show_progress: Whether to log progress every PROGRESS_LOG_INTERVAL documents
+            
+        Returns:
+            Number of recommendations saved
+        """
         try:
-            collection_ref = self.db.collection(self.collection_name)
-            batch = self.db.batch()
-            batch_count = 0
-            total_saved = 0
+            writes = []
+            total_queued = 0
+            skipped = 0
+            failed = 0
+            in_flight = set()
             
-            for record in records:
-                # Use recommendation_id as document ID for idempotency
-                doc_id = record['recommendation_id']
-                doc_ref = collection_ref.document(doc_id)
-                
-                # Convert datetime objects to strings for Firestore
-                firestore_record = record.copy()
-                if 'last_refresh_time' in firestore_record and firestore_record['last_refresh_time']:
-                    if isinstance(firestore_record['last_refresh_time'], str):
-                        firestore_record['last_refresh_time'] = firestore_record['last_refresh_time']
-                    else:
-                        firestore_record['last_refresh_time'] = firestore_record['last_refresh_time'].isoformat()
+            stored_versions = self.stored_versions
+            refresh_after = (date.today() - timedelta(days=settings.stale_cleanup_days // 2)).isoformat()
+            
+            async for record in records:
+                if record is None:
+                    if writes:
+                        failed += await self._start_commit(in_flight, writes)
+                        writes = []
+                    continue
                 
-                if 'collected_at' in firestore_record and firestore_record['collected_at']:
-                    if isinstance(firestore_record['collected_at'], str):
-                        firestore_record['collected_at'] = firestore_record['collected_at']
-                    else:
-                        firestore_record['collected_at'] = firestore_record['collected_at'].isoformat()
+                doc_id = record['recommendation_id']
+                # Each recommendation is fetched once per run, so its entry is
+                # dropped once compared and the preload shrinks as the run goes
+                stored = stored_versions.pop(doc_id, None)
+                if stored is not None:
+                    etag, last_updated, app_code, bu_code = stored
+                    if (
+                        etag == record['etag']
+                        and app_code == record['app_code']
+                        and bu_code == record['bu_code']
+                        and last_updated is not None
+                        and last_updated >= refresh_after
+                    ):
+                        skipped += 1
+                        total_queued += 1
+                        continue
                 
-                if 'updated_at' in firestore_record and firestore_record['updated_at']:
-                    if isinstance(firestore_record['updated_at'], str):
-                        firestore_record['updated_at'] = firestore_record['updated_at']
-                    else:
-                        firestore_record['updated_at'] = firestore_record['updated_at'].isoformat()
+                # Use recommendation_id as document ID for idempotency. Records
+                # from _parse_recommendation already hold ISO strings for all timestamps.
+                writes.append(Write(update=Document(
+                    name=self.document_prefix + doc_id,
+                    fields=firestore_helpers.encode_dict(record)
+                )))
+                total_queued += 1
                 
-                batch.set(doc_ref, firestore_record)
-                batch_count += 1
+                if len(writes) >= self.batch_size:
+                    failed += await self._start_commit(in_flight, writes)
+                    writes = []
                 
-                # Use configured batch size
-                if batch_count >= self.batch_size:
-                    batch.commit()
-                    total_saved += batch_count
-                    if show_progress:
-                        logger.info(f"Committed batch of {batch_count} documents. Total: {total_saved}")
-                    batch = self.db.batch()
-                    batch_count = 0
-            
-            # Commit remaining records
-            if batch_count > 0:
-                batch.commit()
-                total_saved += batch_count
-            
-            logger.info(f"Successfully saved {total_saved} recommendations to Firestore")
+                if show_progress and total_queued % PROGRESS_LOG_INTERVAL == 0:
+                    logger.info(f"Queued {total_queued} documents for writing")
+            
+            # Commit the last partial batch and wait for remaining commits
+            if writes:
+                in_flight.add(asyncio.create_task(self._commit_writes(writes)))
+            if in_flight:
+                failed += sum(await asyncio.gather(*in_flight))
+            
+            if not total_queued:
+                logger.debug("No records to save")
+                return 0
+            if failed:
+                logger.error(f"Failed to save {failed} of {total_queued} recommendations to Firestore")
+            logger.info(
+                f"Successfully saved {total_queued - failed} recommendations to Firestore "
+                f"({skipped} unchanged and not rewritten)"
+            )
+            return total_queued - failed
                 
         except Exception as e:
             logger.error(f"Error saving to Firestore: {e}")
             raise
     
-    def cleanup_stale_recommendations(self):
+    async def cleanup_stale_recommendations(self):
         """
         Delete recommendations that have not been updated within the configured
         retention window (stale_cleanup_days). Uses the 'last_updated' field
         (YYYY-MM-DD string) to determine staleness.
+        
+        Only document names are needed, so the query reads a single field.
+        Deletes are committed in batches with up to write_concurrency
+        commits in flight, like the recommendation writes.
         """
         cleanup_days = settings.stale_cleanup_days
         cutoff_date = (date.today() - timedelta(days=cleanup_days)).isoformat()
@@ -642,30 +1384,34 @@ class CostRecommendationCollector:
         try:
             collection_ref = self.db.collection(self.collection_name)
             # Query for documents where last_updated is older than the cutoff
-            stale_query = collection_ref.where('last_updated', '<', cutoff_date)
+            stale_query = collection_ref.where('last_updated', '<', cutoff_date).select(['last_updated'])
             stale_docs = stale_query.stream()
             
-            batch = self.db.batch()
-            batch_count = 0
-            total_deleted = 0
+            deletes = []
+            total_stale = 0
+            failed = 0
+            in_flight = set()
             
-            for doc in stale_docs:
-                batch.delete(doc.reference)
-                batch_count += 1
+            async for doc in stale_docs:
+                deletes.append(Write(delete=self.document_prefix + doc.id))
+                total_stale += 1
+                
+                if len(deletes) >= self.batch_size:
+                    failed += await self._start_commit(in_flight, deletes)
+                    deletes = []
                 
-                if batch_count >= self.batch_size:
-                    batch.commit()
-                    total_deleted += batch_count
-                    logger.info(f"Deleted batch of {batch_count} stale documents. Total: {total_deleted}")
-                    batch = self.db.batch()
-                    batch_count = 0
+                if total_stale % PROGRESS_LOG_INTERVAL == 0:
+                    logger.info(f"Queued {total_stale} stale documents for deletion")
             
-            # Commit remaining deletes
-            if batch_count > 0:
-                batch.commit()
-                total_deleted += batch_count
+            # Commit remaining deletes and wait for remaining commits
+            if deletes:
+                in_flight.add(asyncio.create_task(self._commit_writes(deletes)))
+            if in_flight:
+                failed += sum(await asyncio.gather(*in_flight))
             
-            logger.info(f"Stale cleanup complete: deleted {total_deleted} recommendations")
+            if failed:
+                logger.error(f"Failed to delete {failed} of {total_stale} stale recommendations")
+            logger.info(f"Stale cleanup complete: deleted {total_stale - failed} recommendations")
             
         except Exception as e:
             logger.error(f"Error during stale recommendation cleanup: {e}")
@@ -677,39 +1423,88 @@ class CostRecommendationCollector:
         Optimized for large-scale processing (100+ projects).
         
         Args:
-            max_workers: Number of threads to use for parallel processing (defaults to config.MAX_WORKERS)
+            max_workers: Number of projects to process concurrently (defaults to config.MAX_WORKERS)
+        """
+        asyncio.run(self.run_async(max_workers))
+    
+    def _create_async_clients(self):
+        """
+        Create the clients and primitives bound to the running event loop.
+        
+        Each API client owns one gRPC channel, created with keepalive
+        options, that all of its concurrent calls are multiplexed over.
+        """
+        self.db = firestore.AsyncClient(project=settings.gcp_project_id, database=settings.firestore_database)
+        self.firestore_api = FirestoreAsyncClient(
+            transport=FirestoreGrpcAsyncIOTransport(
+                channel=FirestoreGrpcAsyncIOTransport.create_channel(options=GRPC_CHANNEL_OPTIONS)
+            )
+        )
+        self.recommender_client = recommender_v1.RecommenderAsyncClient(
+            transport=RecommenderGrpcAsyncIOTransport(
+                channel=RecommenderGrpcAsyncIOTransport.create_channel(options=GRPC_CHANNEL_OPTIONS)
+            )
+        )
+        self.projects_async_client = resourcemanager_v3.ProjectsAsyncClient(
+            transport=ProjectsGrpcAsyncIOTransport(
+                channel=ProjectsGrpcAsyncIOTransport.create_channel(options=GRPC_CHANNEL_OPTIONS)
+            )
+        )
+        self.service_usage_client = service_usage_v1.ServiceUsageAsyncClient(
+            transport=ServiceUsageGrpcAsyncIOTransport(
+                channel=ServiceUsageGrpcAsyncIOTransport.create_channel(options=GRPC_CHANNEL_OPTIONS)
+            )
+        )
+        self.fetch_semaphore = asyncio.Semaphore(settings.recommender_max_concurrency)
+        self.write_queue = asyncio.Queue(maxsize=settings.write_queue_size)
+    
+    async def run_async(self, max_workers=None):
+        """
+        Collect cost recommendations for all projects on one event loop.
+        
+        Recommender, Firestore and project number calls use the async
+        clients; project listing and inventory reads, which use synchronous
+        clients, run in worker threads. Parsed records stream through the write queue to a
+        writer task, so batch commits overlap with fetching and nothing is
+        held for the whole run. With process_workers above 1, projects are
+        split across that many worker processes instead.
+        
+        Args:
+            max_workers: Number of projects to process concurrently (defaults to config.MAX_WORKERS)
         """
         if max_workers is None:
             max_workers = self.max_workers
             
         logger.info("Starting cost recommendation collection")
-        logger.info(f"Performance settings: {max_workers} workers, batch size {self.batch_size}")
+        logger.info(
+            f"Performance settings: {max_workers} workers, {self.process_workers} processes, "
+            f"batch size {self.batch_size}"
+        )
+        
+        self._create_async_clients()
         
         try:
             # Ensure Firestore collection is accessible
             self.ensure_firestore_collection()
             
-            # 1. Process Billing Account Recommendations (if configured)
-            if settings.billing_account_ids:
-                logger.info(f"Processing {len(settings.billing_account_ids)} billing accounts")
-                for billing_id in settings.billing_account_ids:
-                    try:
-                        logger.info(f"Processing billing account: {billing_id}")
-                        billing_recs = self.get_recommendations_for_billing_account(billing_id)
-                        if billing_recs:
-                            self.save_recommendations_to_firestore(billing_recs, show_progress=False)
-                            logger.info(f"Saved {len(billing_recs)} recommendations for billing account {billing_id}")
-                    except Exception as e:
-                        logger.error(f"Error processing billing account {billing_id}: {e}")
-            else:
-                logger.info("No billing accounts configured, skipping spend-based CUD recommendations")
+            # One collection timestamp for every record written by this run
+            collected_at = datetime.utcnow().isoformat()
+            
+            # 1. Get all projects, while the stored recommendation versions
+            # are read once for every writer of the run
+            projects_data, stored_by_project = await asyncio.gather(
+                asyncio.to_thread(self.get_all_projects),
+                self._load_stored_versions()
+            )
             
-            # 2. Process Project Recommendations
-            # Get all projects
-            projects_data = self.get_all_projects()
+            # 2. Billing account recommendations (if configured) are collected
+            # alongside the project recommendations rather than before them
+            billing = self.collect_billing_accounts(collected_at)
             
             if not projects_data:
                 logger.warning("No projects found")
+                self.stored_versions = self._stored_versions_of(stored_by_project, stored_by_project)
+                await self._run_with_writer(billing)
                 return
             
             # Determine if we have a list or a dict
@@ -720,80 +1515,292 @@ class CostRecommendationCollector:
                 projects = projects_data
                 projects_metadata = {}
             
-            # For large-scale processing, save recommendations incrementally
-            # instead of accumulating all in memory
-            total_recommendations = 0
-            lock = threading.Lock()
-            project_batches = []
-            
-            def process_project(project_id):
-                """Process a single project and save recommendations immediately."""
-                logger.debug(f"Processing project: {project_id}")
-                try:
-                    metadata = projects_metadata.get(project_id) if projects_metadata else None
-                    recommendations = self.get_recommendations_for_project(project_id, metadata=metadata)
-                    
-                    # Save recommendations immediately if we have any
-                    if recommendations:
-                        with lock:
-                            self.save_recommendations_to_firestore(recommendations, show_progress=False)
-                            nonlocal total_recommendations
-                            total_recommendations += len(recommendations)
-                    
-                    logger.info(f"Completed {project_id}: {len(recommendations)} recommendations")
-                    return len(recommendations)
-                except Exception as e:
-                    logger.error(f"Error processing project {project_id}: {e}")
-                    return 0
-            
-            # Process projects in parallel
-            logger.info(f"Processing {len(projects)} projects with {max_workers} threads")
-            start_time = datetime.utcnow()
-            
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = {executor.submit(process_project, project_id): project_id 
-                          for project_id in projects}
-                
-                completed = 0
-                for future in as_completed(futures):
-                    completed += 1
-                    project_id = futures[future]
-                    try:
-                        rec_count = future.result()
-                        # Log progress every 10 projects for large batches
-                        if completed % 10 == 0 or completed == len(projects):
-                            elapsed = (datetime.utcnow() - start_time).total_seconds()
-                            rate = completed / elapsed if elapsed > 0 else 0
-                            eta = (len(projects) - completed) / rate if rate > 0 else 0
-                            logger.info(
-                                f"Progress: {completed}/{len(projects)} projects "
-                                f"({completed*100//len(projects)}%) | "
-                                f"Rate: {rate:.1f} projects/sec | "
-                                f"ETA: {eta/60:.1f} min"
-                            )
-                    except Exception as e:
-                        logger.error(f"Exception for project {project_id}: {e}")
-            
-            elapsed_time = (datetime.utcnow() - start_time).total_seconds()
-            logger.info(
-                f"Successfully collected and stored {total_recommendations} "
-                f"cost recommendations from {len(projects)} projects "
-                f"in {elapsed_time:.1f} seconds ({elapsed_time/60:.1f} minutes)"
-            )
+            if self.process_workers > 1 and len(projects) > 1:
+                # This process's writer only writes billing records; the
+                # project versions go to the shard processes writing them
+                project_ids = set(projects)
+                self.stored_versions = self._stored_versions_of(
+                    stored_by_project, [key for key in stored_by_project if key not in project_ids]
+                )
+                await asyncio.gather(
+                    self._run_with_writer(billing),
+                    self._collect_in_processes(
+                        projects, projects_metadata, collected_at, max_workers, stored_by_project
+                    )
+                )
+            else:
+                # One writer for both
+                self.stored_versions = self._stored_versions_of(stored_by_project, stored_by_project)
+                await self._run_with_writer(self._collect_together(
+                    billing,
+                    self.collect_projects(projects, projects_metadata, collected_at, max_workers)
+                ))
+            
+            await asyncio.to_thread(self.save_project_numbers)
             
             # 3. Cleanup stale recommendations
-            self.cleanup_stale_recommendations()
+            await self.cleanup_stale_recommendations()
             
         except Exception as e:
             logger.error(f"Error in cost recommendation collection: {e}")
             raise
+    
+    async def _run_with_writer(self, collect) -> int:
+        """
+        Run a collection coroutine while a writer task saves what it queues.
+        
+        Args:
+            collect: Coroutine that puts records on the write queue and
+                returns how many it queued
+            
+        Returns:
+            Number of recommendations queued by the coroutine
+        """
+        writer = asyncio.create_task(self._write_queued_records())
+        try:
+            total_recommendations = await collect
+        finally:
+            # The None sentinel tells the writer to flush and stop
+            await self.write_queue.put(None)
+            saved = await writer
+        
+        if total_recommendations:
+            logger.info(f"Saved {saved} of {total_recommendations} collected recommendations")
+        return total_recommendations
+    
+    async def _collect_together(self, *collects) -> int:
+        """
+        Run collection coroutines concurrently.
+        
+        Returns:
+            Total number of recommendations they queued
+        """
+        return sum(await asyncio.gather(*collects))
+    
+    async def collect_billing_accounts(self, collected_at: str) -> int:
+        """
+        Fetch recommendations of the configured billing accounts onto the write queue.
+        
+        Args:
+            collected_at: ISO timestamp stamped on every record
+            
+        Returns:
+            Number of recommendations queued
+        """
+        total_recommendations = 0
+        
+        if not settings.billing_account_ids:
+            logger.info("No billing accounts configured, skipping spend-based CUD recommendations")
+            return total_recommendations
+        
+        logger.info(f"Processing {len(settings.billing_account_ids)} billing accounts")
+        
+        async def process_billing_account(billing_id):
+            """Process a single billing account; errors do not affect the other accounts."""
+            try:
+                logger.info(f"Processing billing account: {billing_id}")
+                return await self.get_recommendations_for_billing_account(billing_id, collected_at)
+            except Exception as e:
+                logger.error(f"Error processing billing account {billing_id}: {e}")
+                return 0
+        
+        # Billing accounts are fetched concurrently; the fetch semaphore bounds their calls
+        counts = await asyncio.gather(*(
+            process_billing_account(billing_id) for billing_id in settings.billing_account_ids
+        ))
+        total_recommendations += sum(counts)
+        
+        return total_recommendations
+    
+    async def _collect_in_processes(
+        self,
+        projects: List[str],
+        projects_metadata: Dict[str, Dict[str, Any]],
+        collected_at: str,
+        max_workers: int,
+        stored_by_project: Dict[Optional[str], Dict[str, tuple]]
+    ) -> int:
+        """
+        Split projects across process_workers worker processes.
+        
+        Parsing recommendations is CPU bound and the GIL runs it on one core,
+        so each process runs its own event loop, clients and writer over its
+        share of the projects. Processes are spawned rather than forked
+        because gRPC channels do not survive a fork.
+        
+        Args:
+            projects: Project IDs to collect
+            projects_metadata: Metadata (app_code, bu_code) by project ID
+            collected_at: ISO timestamp stamped on every record
+            max_workers: Number of projects each process handles concurrently
+            stored_by_project: Stored versions by project ID, from _load_stored_versions
+            
+        Returns:
+            Number of recommendations queued across all processes
+        """
+        process_count = min(self.process_workers, len(projects))
+        shards = [projects[i::process_count] for i in range(process_count)]
+        logger.info(f"Processing {len(projects)} projects in {process_count} processes")
+        
+        # Resolve numbers here, where listed projects are already cached, and hand them to the shards
+        project_numbers = await self.get_project_numbers(projects)
+        
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=process_count, mp_context=multiprocessing.get_context('spawn')) as pool:
+            counts = await asyncio.gather(*(
+                loop.run_in_executor(
+                    pool,
+                    collect_project_shard,
+                    shard,
+                    {project_id: projects_metadata[project_id] for project_id in shard if project_id in projects_metadata},
+                    {project_id: project_numbers[project_id] for project_id in shard},
+                    self._stored_versions_of(stored_by_project, shard),
+                    collected_at,
+                    max_workers
+                )
+                for shard in shards
+            ))
+        
+        total_recommendations = sum(counts)
+        logger.info(f"Collected {total_recommendations} cost recommendations from {len(projects)} projects")
+        return total_recommendations
+    
+    async def collect_shard(
+        self,
+        projects: List[str],
+        projects_metadata: Dict[str, Dict[str, Any]],
+        project_numbers: Dict[str, str],
+        stored_versions: Dict[str, tuple],
+        collected_at: str,
+        max_workers: int
+    ) -> int:
+        """
+        Collect and save recommendations of a share of the projects in a worker process.
+        
+        Args:
+            projects: Project IDs of this share
+            projects_metadata: Metadata (app_code, bu_code) by project ID
+            project_numbers: Project numbers by project ID, resolved by the parent
+            stored_versions: Stored versions of this share's recommendations, read by the parent
+            collected_at: ISO timestamp stamped on every record
+            max_workers: Number of projects to process concurrently
+            
+        Returns:
+            Number of recommendations queued
+        """
+        self._project_numbers.update(project_numbers)
+        self.stored_versions = stored_versions
+        self._create_async_clients()
+        return await self._run_with_writer(
+            self.collect_projects(projects, projects_metadata, collected_at, max_workers)
+        )
+    
+    async def collect_projects(
+        self,
+        projects: List[str],
+        projects_metadata: Dict[str, Dict[str, Any]],
+        collected_at: str,
+        max_workers: int
+    ) -> int:
+        """
+        Fetch project recommendations onto the write queue.
+        
+        Args:
+            projects: Project IDs to collect
+            projects_metadata: Metadata (app_code, bu_code) by project ID
+            collected_at: ISO timestamp stamped on every record
+            max_workers: Number of projects to process concurrently
+            
+        Returns:
+            Number of recommendations queued
+        """
+        total_recommendations = 0
+        
+        # Resolve all project numbers up front instead of one lookup per project worker
+        project_numbers = await self.get_project_numbers(projects)
+        
+        async def process_project(project_id):
+            """Process a single project; its records stream to the writer as they are fetched."""
+            logger.debug(f"Processing project: {project_id}")
+            try:
+                metadata = projects_metadata.get(project_id) if projects_metadata else None
+                count = await self.get_recommendations_for_project(
+                    project_id,
+                    project_number=project_numbers.get(project_id),
+                    metadata=metadata,
+                    collected_at=collected_at
+                )
+                
+                logger.info(f"Completed {project_id}: {count} recommendations")
+                return count
+            except Exception as e:
+                logger.error(f"Error processing project {project_id}: {e}")
+                return 0
+        
+        # max_workers worker tasks take projects from one shared iterator, so
+        # the number of tasks stays bounded however many projects there are
+        pending_projects = iter(projects)
+        completions = asyncio.Queue()
+        
+        async def project_worker():
+            """Process projects one at a time until none are left."""
+            for project_id in pending_projects:
+                completions.put_nowait(await process_project(project_id))
+        
+        # Process projects concurrently
+        logger.info(f"Processing {len(projects)} projects, {max_workers} at a time")
+        start_time = time.monotonic()
+        
+        total_projects = len(projects)
+        workers = [asyncio.create_task(project_worker()) for _ in range(min(max_workers, total_projects))]
+        # Progress is only computed and formatted when INFO records are emitted
+        log_progress = logger.isEnabledFor(logging.INFO)
+        for completed in range(1, total_projects + 1):
+            total_recommendations += await completions.get()
+            # Log progress every 10 projects for large batches
+            if log_progress and (completed % 10 == 0 or completed == total_projects):
+                elapsed = time.monotonic() - start_time
+                rate = completed / elapsed if elapsed > 0 else 0
+                eta = (total_projects - completed) / rate if rate > 0 else 0
+                logger.info(
+                    "Progress: %d/%d projects (%d%%) | Rate: %.1f projects/sec | ETA: %.1f min",
+                    completed, total_projects, completed * 100 // total_projects, rate, eta / 60
+                )
+        await asyncio.gather(*workers)
+        
+        elapsed_time = time.monotonic() - start_time
+        logger.info(
+            f"Successfully collected {total_recommendations} "
+            f"cost recommendations from {len(projects)} projects "
+            f"in {elapsed_time:.1f} seconds ({elapsed_time/60:.1f} minutes)"
+        )
+        
+        return total_recommendations
+
+
+def collect_project_shard(
+    projects: List[str],
+    projects_metadata: Dict[str, Dict[str, Any]],
+    project_numbers: Dict[str, str],
+    stored_versions: Dict[str, tuple],
+    collected_at: str,
+    max_workers: int
+) -> int:
+    """Entry point of a worker process: collect recommendations of a share of the projects."""
+    collector = CostRecommendationCollector()
+    return asyncio.run(
+        collector.collect_shard(projects, projects_metadata, project_numbers, stored_versions, collected_at, max_workers)
+    )
 
 
 def main():
     """Main entry point for the Cloud Run job."""
-    logger.info("=" * 80)
-    logger.info("Starting GCP Cost Recommendation Collection Job")
-    logger.info("=" * 80)
+    # One multi-line record instead of one record per banner line
+    logger.info("\n".join([
+        "=" * 80,
+        "Starting GCP Cost Recommendation Collection Job",
+        "=" * 80,
+    ]))
     
     try:
         collector = CostRecommendationCollector()
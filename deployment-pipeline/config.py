@@ -4,11 +4,19 @@ Loads environment-specific settings from .env files.
 """
 
 import os
+import pickle
 from pathlib import Path
 from typing import List, Dict
 from dotenv import load_dotenv
 import yaml
 
+# YAML loader and dumper used for all files. libyaml's C implementation is
+# much faster than the pure Python one; fall back to it when PyYAML lacks libyaml
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+
 # Determine environment
 ENVIRONMENT = os.environ.get('ENVIRONMENT', 'dev')
 
@@ -33,6 +41,30 @@ SOURCE_BRANCH = os.environ.get('SOURCE_BRANCH', 'uat')
 
 # Services Configuration
 SERVICES_CONFIG_FILE = os.environ.get('SERVICES_CONFIG_FILE', 'services_config.yaml')
+# Keep the parsed services config in a pickle next to the YAML file and reuse
+# it while the YAML file is unmodified, skipping YAML parsing at startup
+CACHE_CONFIG = os.environ.get('CACHE_CONFIG', 'False').lower() in ('true', '1', 'yes')
+
+def _load_cached_services(cache_path: Path, mtime_ns: int):
+    """Return the cached services if the cache was written for this version of the config file."""
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_mtime_ns, services = pickle.load(f)
+        if cached_mtime_ns == mtime_ns:
+            return services
+    except Exception:
+        pass
+    return None
+
+def _save_cached_services(cache_path: Path, mtime_ns: int, services: List[Dict[str, str]]):
+    """Write the services cache atomically; a failed write only means no cache."""
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((mtime_ns, services), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: could not write services config cache {cache_path}: {e}")
 
 def load_services_config(config_file: str) -> List[Dict[str, str]]:
     """
@@ -45,6 +77,9 @@ def load_services_config(config_file: str) -> List[Dict[str, str]]:
         version_file: version.env
         version_variable: APP_VERSION
     
+    With CACHE_CONFIG enabled, the validated services are reused from
+    {config_file}.cache.pkl as long as the YAML file's mtime is unchanged.
+    
     Returns:
         List of service dictionaries
     """
@@ -53,9 +88,17 @@ def load_services_config(config_file: str) -> List[Dict[str, str]]:
     if not config_path.exists():
         raise FileNotFoundError(f"Services config file not found: {config_path}")
     
+    if CACHE_CONFIG:
+        cache_path = config_path.with_name(config_path.name + '.cache.pkl')
+        mtime_ns = config_path.stat().st_mtime_ns
+        services = _load_cached_services(cache_path, mtime_ns)
+        if services is not None:
+            print(f"Loaded {len(services)} services from cached {config_file}")
+            return services
+    
     try:
         with open(config_path, 'r') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=YamlLoader)
         
         if not data or 'services' not in data:
             raise ValueError(f"Invalid services config format in {config_file}")
@@ -70,6 +113,8 @@ def load_services_config(config_file: str) -> List[Dict[str, str]]:
                     raise ValueError(f"Service {service.get('name', 'unknown')} missing required field: {field}")
         
         print(f"Loaded {len(services)} services from {config_file}")
+        if CACHE_CONFIG:
+            _save_cached_services(cache_path, mtime_ns, services)
         return services
         
     except yaml.YAMLError as e:
@@ -77,10 +122,16 @@ def load_services_config(config_file: str) -> List[Dict[str, str]]:
 
 MICROSERVICES = load_services_config(SERVICES_CONFIG_FILE)
 
+# Number of version files fetched from Bitbucket concurrently
+MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '16'))
+
 # Output Configuration
-OUTPUT_FILE = os.environ.get('OUTPUT_FILE', 'services.yaml')
+# Format of the output manifest: 'yaml' (default) or 'json'. JSON is
+# written much faster and can be read with jq by most CD tooling.
+OUTPUT_FORMAT = os.environ.get('OUTPUT_FORMAT', 'yaml').lower()
+OUTPUT_FILE = os.environ.get('OUTPUT_FILE', 'services.json' if OUTPUT_FORMAT == 'json' else 'services.yaml')
 KEEP_HISTORY = os.environ.get('KEEP_HISTORY', 'True').lower() in ('true', '1', 'yes')
-HISTORY_FILE = os.environ.get('HISTORY_FILE', 'services_history.yaml')
+HISTORY_FILE = os.environ.get('HISTORY_FILE', 'services_history.jsonl')
 
 # Logging Configuration
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
@@ -91,6 +142,8 @@ CONFIG = {
     'bitbucket_base_url': BITBUCKET_BASE_URL,
     'source_branch': SOURCE_BRANCH,
     'microservices_count': len(MICROSERVICES),
+    'max_workers': MAX_WORKERS,
+    'output_format': OUTPUT_FORMAT,
     'output_file': OUTPUT_FILE,
     'keep_history': KEEP_HISTORY,
     'log_level': LOG_LEVEL,
@@ -4,16 +4,24 @@ Deployment Pipeline - Version Scanner
 Scans Bitbucket repositories for microservice versions and generates deployment manifest.
 """
 
+import json
 import logging
 import os
+import re
 import sys
 import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Import configuration
 import config
@@ -25,21 +33,86 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Serializes the JSON manifest and history lines. orjson is much faster than
+# the stdlib encoder; both fall back to str() for values JSON cannot hold.
+try:
+    import orjson
+    
+    def to_json(data: Any, indent: bool = False) -> str:
+        return orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+except ImportError:
+    def to_json(data: Any, indent: bool = False) -> str:
+        if indent:
+            return json.dumps(data, default=str, indent=2)
+        # Compact separators, as orjson writes them, for history lines
+        return json.dumps(data, default=str, separators=(',', ':'))
+
+# Returned by fetch_file_content in place of the content when the file still
+# has the ETag, or is unmodified since the Last-Modified date, sent with the
+# request (HTTP 304)
+NOT_MODIFIED = object()
+
+# Service fields kept in the versions sidecar of a YAML manifest, see
+# VersionManager.save_services_yaml
+SIDECAR_SERVICE_FIELDS = ('name', 'version', 'repo_path', 'version_file', 'version_variable', 'etag', 'last_modified')
+
+# Runs kept when the history file is trimmed, and the file size that triggers trimming
+HISTORY_MAX_ENTRIES = 50
+HISTORY_COMPACT_BYTES = 1024 * 1024
+
+# (connect, read) timeouts of a Bitbucket request in seconds. An unreachable
+# host fails after the short connect timeout instead of holding a fetch
+# thread for the whole read timeout on every retry.
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Non-empty, non-comment lines of a version file, see parse_version_from_file
+PLAIN_LINE_PATTERN = re.compile(r'^[ \t]*([^#\s].*)$', re.MULTILINE)
+
+
+@lru_cache(maxsize=64)
+def _variable_pattern(variable_name: str) -> re.Pattern:
+    """Return the compiled pattern matching a VARIABLE=value line, cached per variable."""
+    return re.compile(rf'^[ \t]*{re.escape(variable_name)}[ \t]*=(.*)$', re.MULTILINE)
+
 
 class BitbucketClient:
     """Client for interacting with Bitbucket API."""
     
-    def __init__(self, base_url: str, access_token: str):
+    def __init__(self, base_url: str, access_token: str, pool_size: int = 16):
         """
         Initialize Bitbucket client with HTTP access token.
         
         Args:
             base_url: Bitbucket base URL (e.g., https://bitbucket.org/your-org)
             access_token: Bitbucket HTTP access token (Bearer token)
+            pool_size: Connections kept open to Bitbucket; at least the
+                number of threads fetching concurrently
         """
         self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
         
+        # All requests go to the one Bitbucket host, so a single connection
+        # pool is kept, holding a connection per fetching thread alive between
+        # requests instead of the default 10. Rate limits and transient
+        # server errors are retried with jittered exponential backoff, honouring
+        # Retry-After; 401, 403 and 404 are never retried. The last response
+        # is returned as is, so its status code is still logged below.
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=4,
+                backoff_factor=0.5,
+                backoff_jitter=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['GET'],
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
         # Set Authorization header with Bearer token
         if access_token:
             self.session.headers.update({
@@ -51,76 +124,117 @@ class BitbucketClient:
         
         logger.info(f"[AUDIT] Bitbucket base URL: {self.base_url}")
     
+    def raw_url(self, repo_path: str, file_path: str, branch: str = 'main') -> str:
+        """
+        Build the raw file URL of a file on a branch.
+        
+        Args:
+            repo_path: Repository path (e.g., 'auth-api')
+            file_path: File path within repo (e.g., 'version.env')
+            branch: Branch name (default: 'main')
+            
+        Returns:
+            The URL to GET the file content from
+        """
+        # Bitbucket URL format: base-url/raw/<file-name>?at=refs%2Fheads%2F<branch>
+        # URL encode the branch reference
+        encoded_branch = urllib.parse.quote(f"refs/heads/{branch}", safe='')
+        return f"{self.base_url}/{repo_path}/raw/{file_path}?at={encoded_branch}"
+    
     def fetch_file_content(
         self, 
         repo_path: str, 
         file_path: str, 
-        branch: str = 'main'
-    ) -> Optional[str]:
+        branch: str = 'main',
+        etag: Optional[str] = None,
+        url: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[str], Optional[str]]:
         """
         Fetch file content from Bitbucket repository.
         
+        With an ETag or Last-Modified date from a previous fetch the request
+        is conditional, and Bitbucket sends no content if the file has not
+        changed since.
+        
         Args:
             repo_path: Repository path (e.g., 'auth-api')
             file_path: File path within repo (e.g., 'version.env')
             branch: Branch name (default: 'main')
+            etag: ETag of the previously fetched content, if any
+            url: The file's raw_url, if already built
+            last_modified: Last-Modified date of the previously fetched content, if any
             
         Returns:
-            File content as string, or None if not found
+            Tuple of (content, ETag, Last-Modified). The content is the file
+            as string, NOT_MODIFIED if the file has not changed since the
+            given ETag or date, or None if not found
         """
-        # Bitbucket URL format: base-url/raw/<file-name>?at=refs%2Fheads%2F<branch>
-        # URL encode the branch reference
-        branch_ref = f"refs/heads/{branch}"
-        encoded_branch = urllib.parse.quote(branch_ref, safe='')
+        url = url or self.raw_url(repo_path, file_path, branch)
         
-        url = f"{self.base_url}/{repo_path}/raw/{file_path}?at={encoded_branch}"
+        # One audit record per request; the fields are also attached as the
+        # record's 'audit' attribute for structured log handlers
+        audit = {'url': url, 'repo': repo_path, 'file': file_path, 'branch': branch}
         
         try:
-            logger.info(f"[AUDIT] Fetching file from Bitbucket")
-            logger.info(f"[AUDIT]   URL: {url}")
-            logger.info(f"[AUDIT]   Repository: {repo_path}")
-            logger.info(f"[AUDIT]   File: {file_path}")
-            logger.info(f"[AUDIT]   Branch: {branch} (ref: {branch_ref})")
-            
-            response = self.session.get(url, timeout=10)
-            
-            logger.info(f"[AUDIT] Response: HTTP {response.status_code}")
+            # Servers evaluate If-None-Match first when both validators are sent
+            headers = {}
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+            response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            audit['status'] = response.status_code
             
             if response.status_code == 200:
+                # Version files are UTF-8 text. Without a charset in the
+                # response, requests would run charset detection over the body.
+                response.encoding = response.encoding or 'utf-8'
                 content = response.text
-                content_length = len(content)
-                logger.info(f"[AUDIT] Successfully fetched file ({content_length} bytes)")
+                logger.info(
+                    f"[AUDIT] GET {url} -> HTTP 200, fetched {repo_path}/{file_path} on branch {branch} ({len(content)} bytes)",
+                    extra={'audit': audit}
+                )
                 logger.debug(f"File content preview: {content[:100]}...")
-                return content
+                return content, response.headers.get('ETag'), response.headers.get('Last-Modified')
+            elif response.status_code == 304:
+                logger.info(
+                    f"[AUDIT] GET {url} -> HTTP 304, {repo_path}/{file_path} not modified since last fetch (ETag {etag}, Last-Modified {last_modified})",
+                    extra={'audit': audit}
+                )
+                return NOT_MODIFIED, etag, last_modified
             elif response.status_code == 404:
-                logger.error(f"[AUDIT] File not found: {repo_path}/{file_path} on branch {branch}")
-                logger.error(f"[AUDIT] URL attempted: {url}")
-                return None
+                logger.error(
+                    f"[AUDIT] GET {url} -> HTTP 404, file not found: {repo_path}/{file_path} on branch {branch}",
+                    extra={'audit': audit}
+                )
             elif response.status_code == 401:
-                logger.error(f"[AUDIT] Authentication failed (HTTP 401)")
-                logger.error(f"[AUDIT] Check BITBUCKET_USERNAME and BITBUCKET_APP_PASSWORD")
-                return None
+                logger.error(
+                    f"[AUDIT] GET {url} -> HTTP 401, authentication failed; check BITBUCKET_ACCESS_TOKEN",
+                    extra={'audit': audit}
+                )
             elif response.status_code == 403:
-                logger.error(f"[AUDIT] Access forbidden (HTTP 403)")
-                logger.error(f"[AUDIT] Check repository permissions for user")
-                return None
+                logger.error(
+                    f"[AUDIT] GET {url} -> HTTP 403, access forbidden; check repository permissions for user",
+                    extra={'audit': audit}
+                )
             else:
-                logger.error(f"[AUDIT] Unexpected error: HTTP {response.status_code}")
-                logger.error(f"[AUDIT] Response body: {response.text[:200]}")
-                return None
+                audit['body'] = response.text[:200]
+                logger.error(
+                    f"[AUDIT] GET {url} -> HTTP {response.status_code}, unexpected error. Response body: {audit['body']}",
+                    extra={'audit': audit}
+                )
+            return None, None, None
                 
         except requests.exceptions.Timeout:
-            logger.error(f"[AUDIT] Request timeout after 10s")
-            logger.error(f"[AUDIT] URL: {url}")
-            return None
+            logger.error(f"[AUDIT] GET {url} -> request timeout after {REQUEST_TIMEOUT[1]}s", extra={'audit': audit})
+            return None, None, None
         except requests.exceptions.ConnectionError as e:
-            logger.error(f"[AUDIT] Connection error: {e}")
-            logger.error(f"[AUDIT] URL: {url}")
-            return None
+            logger.error(f"[AUDIT] GET {url} -> connection error: {e}", extra={'audit': audit})
+            return None, None, None
         except requests.exceptions.RequestException as e:
-            logger.error(f"[AUDIT] Request failed: {e}")
-            logger.error(f"[AUDIT] URL: {url}")
-            return None
+            logger.error(f"[AUDIT] GET {url} -> request failed: {e}", extra={'audit': audit})
+            return None, None, None
     
     def parse_version_from_file(self, file_content: str, variable_name: str) -> Optional[str]:
         """
@@ -140,29 +254,22 @@ class BitbucketClient:
         if not file_content:
             return None
         
-        # Try to find variable assignment (e.g., APP_VERSION=v1.2.3)
-        for line in file_content.split('\n'):
-            line = line.strip()
-            
-            # Skip comments and empty lines
-            if not line or line.startswith('#'):
-                continue
-            
-            # Check for variable assignment
-            if '=' in line:
-                parts = line.split('=', 1)
-                var_name = parts[0].strip()
-                var_value = parts[1].strip().strip('"').strip("'")
-                
-                if var_name == variable_name:
-                    logger.debug(f"Found {variable_name}={var_value}")
-                    return var_value
+        # Find the variable assignment (e.g., APP_VERSION=v1.2.3) with one
+        # regex scan; comment lines never match as they start with '#'
+        match = _variable_pattern(variable_name).search(file_content)
+        if match:
+            var_value = match.group(1).strip().strip('"').strip("'")
+            logger.debug(f"Found {variable_name}={var_value}")
+            return var_value
+        
+        # Fallback: if file is single line without '=', return as-is. The
+        # regex skips blank and comment lines and stops at the second line.
+        plain_lines = [m.group(1).strip() for m in islice(PLAIN_LINE_PATTERN.finditer(file_content), 2)]
+        plain_line = plain_lines[0] if len(plain_lines) == 1 else None
         
-        # Fallback: if file is single line without '=', return as-is
-        lines = [l.strip() for l in file_content.split('\n') if l.strip() and not l.strip().startswith('#')]
-        if len(lines) == 1 and '=' not in lines[0]:
-            logger.debug(f"Using plain text version: {lines[0]}")
-            return lines[0]
+        if plain_line is not None and '=' not in plain_line:
+            logger.debug(f"Using plain text version: {plain_line}")
+            return plain_line
         
         logger.warning(f"Could not find variable '{variable_name}' in file content")
         return None
@@ -183,6 +290,11 @@ class VersionManager:
         self.output_file = Path(output_file)
         self.history_file = Path(history_file)
         self.keep_history = keep_history
+        # JSON copy of what _load_current_versions needs from a YAML manifest
+        self.versions_file = self.output_file.with_suffix('.versions.json')
+        # (ETag, Last-Modified, version) of each version file fetched by the
+        # last run from the same branch, by (repo_path, version_file, version_variable)
+        self.file_validators: Dict[Tuple[str, str, str], Tuple[Optional[str], Optional[str], str]] = {}
         self.current_versions = self._load_current_versions()
         
         logger.info(f"Initialized VersionManager (output: {output_file})")
@@ -191,7 +303,12 @@ class VersionManager:
     
     def _load_current_versions(self) -> Dict[str, str]:
         """
-        Load current versions from existing services.yaml file.
+        Load current versions from existing services.yaml file, along with
+        the ETags and Last-Modified dates of their version files (into
+        file_validators).
+        
+        A YAML manifest is read from its JSON versions sidecar instead, as
+        long as the sidecar is at least as recent as the manifest.
         
         Returns:
             Dictionary mapping service name to version
@@ -201,15 +318,30 @@ class VersionManager:
             return {}
         
         try:
-            with open(self.output_file, 'r') as f:
-                data = yaml.safe_load(f)
+            if config.OUTPUT_FORMAT == 'json':
+                with open(self.output_file, 'r') as f:
+                    data = json.load(f)
+            elif self._versions_file_current():
+                with open(self.versions_file, 'r') as f:
+                    data = json.load(f)
+            else:
+                with open(self.output_file, 'r') as f:
+                    data = yaml.load(f, Loader=config.YamlLoader)
             
             if not data or 'services' not in data:
                 return {}
             
+            # Validators are only valid for the branch they were fetched from
+            same_branch = (data.get('metadata') or {}).get('source_branch') == config.SOURCE_BRANCH
+            
             versions = {}
             for service in data['services']:
                 versions[service['name']] = service.get('version', '')
+                if same_branch and (service.get('etag') or service.get('last_modified')):
+                    key = (service.get('repo_path'), service.get('version_file'), service.get('version_variable'))
+                    self.file_validators[key] = (
+                        service.get('etag'), service.get('last_modified'), service.get('version', '')
+                    )
             
             return versions
             
@@ -217,6 +349,13 @@ class VersionManager:
             logger.error(f"Error loading current versions: {e}")
             return {}
     
+    def _versions_file_current(self) -> bool:
+        """Check whether the versions sidecar exists and was written after the manifest."""
+        try:
+            return self.versions_file.stat().st_mtime_ns >= self.output_file.stat().st_mtime_ns
+        except OSError:
+            return False
+    
     def check_version_changed(self, service_name: str, new_version: str) -> bool:
         """
         Check if version has changed from current version.
@@ -230,21 +369,22 @@ class VersionManager:
         """
         current_version = self.current_versions.get(service_name)
         
+        # Most services are unchanged between runs, so that case is checked first
+        if current_version == new_version:
+            logger.debug("%s: Version unchanged (%s)", service_name, new_version)
+            return False
+        
         if current_version is None:
             # New service
             logger.info(f"{service_name}: New service (version: {new_version})")
-            return True
-        
-        if current_version != new_version:
+        else:
             logger.info(f"{service_name}: Version changed {current_version} → {new_version}")
-            return True
-        
-        logger.debug(f"{service_name}: Version unchanged ({new_version})")
-        return False
+        return True
     
     def save_services_yaml(self, services: List[Dict[str, any]]):
         """
-        Save services configuration to YAML file.
+        Save services configuration to the output file, as YAML or as JSON
+        (OUTPUT_FORMAT=json).
         
         Args:
             services: List of service dictionaries
@@ -260,12 +400,22 @@ class VersionManager:
         }
         
         try:
-            # Save main output file
-            with open(self.output_file, 'w') as f:
-                yaml.dump(output_data, f, default_flow_style=False, sort_keys=False)
+            # Serialize fully before touching the output file, then replace it
+            # atomically so a failed run never leaves a truncated manifest
+            if config.OUTPUT_FORMAT == 'json':
+                content = to_json(output_data, indent=True)
+            else:
+                content = yaml.dump(output_data, Dumper=config.YamlDumper, default_flow_style=False, sort_keys=False)
+            self._write_atomic(self.output_file, content)
             
             logger.info(f"Saved services configuration to {self.output_file}")
             
+            # Next run reads versions and validators from the sidecar with
+            # json instead of parsing the YAML manifest. Written after the
+            # manifest, so a stale sidecar is older than it and ignored.
+            if config.OUTPUT_FORMAT != 'json':
+                self._save_versions_file(output_data)
+            
             # Save history if enabled
             if self.keep_history:
                 self._save_history(output_data)
@@ -274,33 +424,58 @@ class VersionManager:
             logger.error(f"Error saving services.yaml: {e}")
             raise
     
+    def _save_versions_file(self, data: Dict):
+        """
+        Save the fields _load_current_versions needs from the manifest as JSON.
+        
+        A failed write only means the next run parses the YAML manifest.
+        
+        Args:
+            data: Services data saved to the manifest
+        """
+        versions_data = {
+            'metadata': {'source_branch': data['metadata']['source_branch']},
+            'services': [
+                {field: service[field] for field in SIDECAR_SERVICE_FIELDS if field in service}
+                for service in data['services']
+            ]
+        }
+        try:
+            self._write_atomic(self.versions_file, to_json(versions_data))
+            logger.debug(f"Saved versions sidecar {self.versions_file}")
+        except Exception as e:
+            logger.warning(f"Error saving versions sidecar {self.versions_file}: {e}")
+    
+    def _write_atomic(self, path: Path, content: str):
+        """
+        Write a file through a temporary file in the same directory and
+        os.replace, so readers see either the old or the new content.
+        """
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(content)
+        os.replace(tmp_path, path)
+    
     def _save_history(self, data: Dict):
         """
         Append current version to history file.
         
+        The history is JSON Lines, one run per line, so saving a run appends
+        a single line instead of rewriting the whole history. Once the file
+        grows past HISTORY_COMPACT_BYTES it is trimmed to the last
+        HISTORY_MAX_ENTRIES runs.
+        
         Args:
             data: Services data to append to history
         """
         try:
-            history = []
+            with open(self.history_file, 'a') as f:
+                f.write(to_json(data) + '\n')
             
-            # Load existing history
-            if self.history_file.exists():
+            if self.history_file.stat().st_size > HISTORY_COMPACT_BYTES:
                 with open(self.history_file, 'r') as f:
-                    existing = yaml.safe_load(f)
-                    if existing and 'history' in existing:
-                        history = existing['history']
-            
-            # Append new entry
-            history.append(data)
-            
-            # Keep only last 50 entries
-            if len(history) > 50:
-                history = history[-50:]
-            
-            # Save history
-            with open(self.history_file, 'w') as f:
-                yaml.dump({'history': history}, f, default_flow_style=False)
+                    history = deque(f, maxlen=HISTORY_MAX_ENTRIES)
+                self._write_atomic(self.history_file, ''.join(history))
+                logger.debug(f"Trimmed history file to last {len(history)} entries")
             
             logger.debug(f"Updated history file: {self.history_file}")
             
@@ -315,7 +490,8 @@ class DeploymentPipeline:
         """Initialize deployment pipeline."""
         self.bitbucket = BitbucketClient(
             base_url=config.BITBUCKET_BASE_URL,
-            access_token=config.BITBUCKET_ACCESS_TOKEN
+            access_token=config.BITBUCKET_ACCESS_TOKEN,
+            pool_size=config.MAX_WORKERS
         )
         
         self.version_manager = VersionManager(
@@ -324,27 +500,53 @@ class DeploymentPipeline:
             keep_history=config.KEEP_HISTORY
         )
         
+        # Raw URL of every service's version file, built once rather than per fetch
+        self.version_urls = [
+            self.bitbucket.raw_url(service['repo_path'], service['version_file'], config.SOURCE_BRANCH)
+            for service in config.MICROSERVICES
+        ]
+        
         logger.info("Initialized DeploymentPipeline")
     
-    def fetch_service_version(self, service: Dict[str, str]) -> Optional[str]:
+    def fetch_service_version(
+        self,
+        service: Dict[str, str],
+        url: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[str], Optional[str]]:
         """
         Fetch version for a single service.
         
+        If the version file was fetched by the previous run, the fetch is
+        conditional on its ETag or Last-Modified date and an unchanged file
+        reuses the previous version.
+        
         Args:
             service: Service configuration dictionary
+            url: Raw URL of the service's version file, if already built
             
         Returns:
-            Version string or None if not found
+            Tuple of (version string or None if not found, ETag and
+            Last-Modified date of the version file)
         """
+        cached = self.version_manager.file_validators.get(
+            (service['repo_path'], service['version_file'], service['version_variable'])
+        )
+        
         # Fetch file content
-        file_content = self.bitbucket.fetch_file_content(
+        file_content, etag, last_modified = self.bitbucket.fetch_file_content(
             repo_path=service['repo_path'],
             file_path=service['version_file'],
-            branch=config.SOURCE_BRANCH
+            branch=config.SOURCE_BRANCH,
+            etag=cached[0] if cached else None,
+            url=url,
+            last_modified=cached[1] if cached else None
         )
         
+        if file_content is NOT_MODIFIED:
+            return cached[2], etag, last_modified
+        
         if not file_content:
-            return None
+            return None, None, None
         
         # Parse version from file content using variable name
         version = self.bitbucket.parse_version_from_file(
@@ -352,7 +554,9 @@ class DeploymentPipeline:
             variable_name=service['version_variable']
         )
         
-        return version
+        if version is None:
+            return None, None, None
+        return version, etag, last_modified
     
     def scan_all_services(self) -> tuple[List[Dict[str, any]], bool]:
         """
@@ -363,15 +567,23 @@ class DeploymentPipeline:
             - services: List of service dictionaries with version and changed status
             - success: True if all services fetched successfully, False otherwise
         """
-        logger.info("=" * 80)
-        logger.info(f"[AUDIT] Starting scan of {len(config.MICROSERVICES)} microservices")
-        logger.info("=" * 80)
+        logger.info("\n".join([
+            "=" * 80,
+            f"[AUDIT] Starting scan of {len(config.MICROSERVICES)} microservices",
+            "=" * 80,
+        ]))
         
         services = []
         failed_services = []
         success_count = 0
         
-        for idx, service_config in enumerate(config.MICROSERVICES, 1):
+        # Fetch all versions from Bitbucket concurrently; results keep the
+        # configured service order
+        workers = max(1, min(config.MAX_WORKERS, len(config.MICROSERVICES)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            versions = list(executor.map(self.fetch_service_version, config.MICROSERVICES, self.version_urls))
+        
+        for idx, (service_config, (version, etag, last_modified)) in enumerate(zip(config.MICROSERVICES, versions), 1):
             service_name = service_config['name']
             logger.info("")
             logger.info(f"[AUDIT] [{idx}/{len(config.MICROSERVICES)}] Processing service: {service_name}")
@@ -379,9 +591,6 @@ class DeploymentPipeline:
             logger.info(f"[AUDIT]   Version file: {service_config['version_file']}")
             logger.info(f"[AUDIT]   Version variable: {service_config['version_variable']}")
             
-            # Fetch version from Bitbucket
-            version = self.fetch_service_version(service_config)
-            
             if version is None:
                 logger.error(f"[AUDIT] ❌ FAILED to fetch version for {service_name}")
                 failed_services.append({
@@ -407,6 +616,11 @@ class DeploymentPipeline:
                 'version_file': service_config['version_file'],
                 'version_variable': service_config['version_variable']
             }
+            # Lets the next run skip downloading an unchanged version file
+            if etag:
+                service_entry['etag'] = etag
+            if last_modified:
+                service_entry['last_modified'] = last_modified
             
             services.append(service_entry)
         
@@ -436,13 +650,16 @@ class DeploymentPipeline:
     
     def run(self):
         """Main execution method."""
-        logger.info("=" * 60)
-        logger.info("Starting Deployment Pipeline - Version Scanner")
-        logger.info("=" * 60)
-        logger.info(f"Environment: {config.ENVIRONMENT}")
-        logger.info(f"Source Branch: {config.SOURCE_BRANCH}")
-        logger.info(f"Output File: {config.OUTPUT_FILE}")
-        logger.info("=" * 60)
+        # One multi-line record instead of one record per banner line
+        logger.info("\n".join([
+            "=" * 60,
+            "Starting Deployment Pipeline - Version Scanner",
+            "=" * 60,
+            f"Environment: {config.ENVIRONMENT}",
+            f"Source Branch: {config.SOURCE_BRANCH}",
+            f"Output File: {config.OUTPUT_FILE}",
+            "=" * 60,
+        ]))
         
         try:
             # Scan all services